@@ -0,0 +1,272 @@
+import time
+import threading
+import numpy as np
+import multiprocessing as mp
+
+from multiprocessing import shared_memory
+from ring_buffer import RingBuffer
+from bounded_queue import register
+from dsp import make_chain
+from recorder import run_source, stream_hub, stop_event
+
+
+class SharedRingBuffer(RingBuffer):
+    """
+    RingBuffer whose samples, timestamps and write index live in one
+    multiprocessing.shared_memory block, so another process can read them
+    without copies through a pipe. One process writes; readers only look at
+    `write_index` and the arrays.
+    """
+
+    def __init__(self, n_channels, capacity, name=None, create=False):
+        size = 8 * (1 + 2 * capacity + 2 * capacity * n_channels)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+        self.n_channels = n_channels
+        self.capacity = capacity
+        buf = self.shm.buf
+        self._header = np.ndarray((1,), dtype=np.int64, buffer=buf)
+        self.times = np.ndarray((2 * capacity,), dtype=np.float64, buffer=buf, offset=8)
+        self.data = np.ndarray((n_channels, 2 * capacity), dtype=np.float64, buffer=buf,
+                               offset=8 + 16 * capacity)
+        if create:
+            self._header[0] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_index(self):
+        return int(self._header[0])
+
+    @write_index.setter
+    def write_index(self, value):
+        # written after the samples, so readers never see an index ahead of its data
+        self._header[0] = value
+
+    def close(self):
+        # numpy views must go before the mapping can be closed
+        del self._header, self.times, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ─── Child process ──────────────────────────────────────────────
+# Runs the source, recording and optional DSP exactly like the in-process
+# recorder.run_source, but publishes into a SharedRingBuffer. The pipe
+# carries only small control messages.
+
+
+class _SharedPublisher:
+    """StreamHub stand-in for run_source: puts (eeg, aux, ts) chunks into the shared ring."""
+
+    def __init__(self, ring, filters=None):
+        self.ring = ring
+        self.filters = filters
+
+    def configure(self, n_eeg, n_aux, sampling_rate):
+        pass
+
+    def put(self, item):
+        eeg, aux, ts = item
+        if self.filters is not None:
+            eeg = self.filters.process(eeg)
+        self.ring.append(np.concatenate((eeg, aux), axis=0) if aux.shape[0] else eeg, ts)
+
+
+def _child_main(conn, factory, kwargs, record, filters, stats_interval):
+    try:
+        source = factory(**kwargs)
+    except Exception as e:
+        conn.send(('error', f'{type(e).__name__}: {e}'))
+        return
+    conn.send(('layout', source.n_eeg, source.n_aux, source.sampling_rate))
+    msg = conn.recv()
+    if msg[0] != 'ring':
+        return
+    ring = SharedRingBuffer(source.n_eeg + source.n_aux, msg[2], name=msg[1])
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def send(*msg):
+        with lock:
+            conn.send(msg)
+
+    def control():
+        # commands from the GUI; a closed pipe means the GUI is gone
+        while not stop.is_set():
+            try:
+                if conn.poll(stats_interval):
+                    if conn.recv()[0] == 'stop':
+                        stop.set()
+                timing = getattr(source, 'timing', None)
+                send('stats', timing.summary() if timing is not None else {})
+            except (EOFError, OSError):
+                stop.set()
+
+    threading.Thread(target=control, daemon=True).start()
+    try:
+        chain = make_chain(filters, source.sampling_rate) if filters else None
+        run_source(source, record, hub=_SharedPublisher(ring, chain), stop=stop)
+    except Exception as e:
+        send('error', f'{type(e).__name__}: {e}')
+    finally:
+        stop.set()
+        send('stopped', ring.write_index)
+        ring.close()
+
+
+# ─── GUI side ───────────────────────────────────────────────────
+
+
+class AcquisitionProcess:
+    """
+    Run a source (built in the child as `factory(**kwargs)`) in its own process.
+
+    Acquisition, recording and the optional `filters` DSP preset then never
+    wait on the GUI's GIL or redraws. A bridge thread in the GUI process
+    copies new samples from the shared ring into `hub` (the recorder's
+    stream_hub by default), so tabs subscribe exactly as before. Setting
+    `stop` (recorder.stop_event) stops the child.
+
+    The ring holds `capacity_seconds`; if the GUI stalls for longer, samples
+    are skipped in the display only (counted in stats()) while the child keeps
+    recording everything.
+    """
+
+    def __init__(self, factory, kwargs=None, record=True, filters=None, capacity_seconds=30.0,
+                 hub=stream_hub, stop=stop_event, poll_interval=0.005, name='Acquisition process'):
+        self.factory = factory
+        self.kwargs = kwargs or {}
+        self.record = record
+        self.filters = filters
+        self.capacity_seconds = capacity_seconds
+        self.hub = hub
+        self.stop_event = stop
+        self.poll_interval = poll_interval
+        self.ring = None
+        self.process = None
+        self.n_eeg = self.n_aux = 0
+        self.sampling_rate = None
+        self.child_stats = {}
+        self.error = None
+        self.delivered = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._cursor = 0
+        self._guard = 0
+        self._finished_at = None
+        self._stop_sent = False
+        self._thread = None
+        self.name = register(name, self)
+
+    def start(self, timeout=30.0):
+        """Spawn the child, set up the shared ring and start bridging; blocks until the source is open."""
+        ctx = mp.get_context('spawn')  # never fork a process that runs Qt
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_child_main, daemon=True, name='acquisition',
+                                   args=(child_conn, self.factory, self.kwargs, self.record,
+                                         self.filters, 1.0))
+        self.process.start()
+        child_conn.close()
+        if not self._conn.poll(timeout):
+            self.process.terminate()
+            raise TimeoutError('Acquisition process did not start')
+        msg = self._conn.recv()
+        if msg[0] == 'error':
+            self.process.join()
+            raise RuntimeError(msg[1])
+        _, self.n_eeg, self.n_aux, self.sampling_rate = msg
+        capacity = max(1, int(self.capacity_seconds * self.sampling_rate))
+        # a chunk being written may overwrite up to this many of the oldest samples
+        self._guard = min(capacity // 2, max(1, int(self.sampling_rate)))
+        self.ring = SharedRingBuffer(self.n_eeg + self.n_aux, capacity, create=True)
+        self._conn.send(('ring', self.ring.name, capacity))
+        self.hub.configure(self.n_eeg, self.n_aux, self.sampling_rate)
+        self._thread = threading.Thread(target=self._bridge, name='acquisition-bridge', daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _poll_control(self):
+        while True:
+            if self.stop_event.is_set() and not self._stop_sent and self._finished_at is None:
+                try:
+                    self._conn.send(('stop',))
+                except OSError:
+                    pass
+                self._stop_sent = True
+            try:
+                if not self._conn.poll():
+                    return
+                msg = self._conn.recv()
+            except (EOFError, OSError):
+                self._finished_at = self._finished_at or self.ring.write_index
+                return
+            if msg[0] == 'stats':
+                self.child_stats = msg[1]
+            elif msg[0] == 'error':
+                self.error = msg[1]
+                print(f'Acquisition process: {msg[1]}')
+            elif msg[0] == 'stopped':
+                self._finished_at = msg[1]
+
+    def _bridge(self):
+        ring = self.ring
+        try:
+            while True:
+                self._poll_control()
+                self._forward(ring)
+                if self._finished_at is not None and self._cursor >= self._finished_at:
+                    break
+                if not self.process.is_alive() and self._finished_at is None:
+                    # child died without saying goodbye; keep what it wrote
+                    self._forward(ring)
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            self.process.join()
+            self._conn.close()
+            self.ring = None
+            ring.close()
+
+    def _forward(self, ring):
+        # read write_index once: ring.window() would re-read it and could start
+        # later than `start`. `guard` samples behind the oldest held one may be
+        # mid-overwrite, since the child writes samples before it moves the index.
+        guard = self._guard
+        end = ring.write_index
+        start = max(self._cursor, end - ring.capacity + guard)
+        if end <= start:
+            return
+        self.max_depth = max(self.max_depth, end - start)
+        p = start % ring.capacity
+        ts = ring.times[p:p + end - start].copy()
+        block = ring.data[:, p:p + end - start].copy()
+        # the child may have lapped us while we copied; discard what it overwrote
+        valid_from = ring.write_index - ring.capacity + guard
+        if valid_from >= end:
+            ts, block, start = ts[:0], block[:, :0], end
+        elif valid_from > start:
+            ts, block = ts[valid_from - start:], block[:, valid_from - start:]
+            start = valid_from
+        self.dropped += start - self._cursor
+        self._cursor = end
+        if len(ts):
+            self.delivered += len(ts)
+            self.hub.publish(block[:self.n_eeg], block[self.n_eeg:], ts)
+
+    def stats(self):
+        ring = self.ring
+        depth = ring.write_index - self._cursor if ring is not None else 0
+        capacity = ring.capacity if ring is not None else 0
+        # the child's source timing (AcquisitionStats.summary(), sent every second):
+        # its instrumentation histograms stay in the child process
+        return {'enqueued': self.delivered + self.dropped + depth, 'dropped': self.dropped,
+                'depth': min(depth, capacity), 'max_depth': self.max_depth,
+                'capacity': capacity, 'policy': 'drop-oldest', 'timing': self.child_stats}
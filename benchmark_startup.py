@@ -0,0 +1,67 @@
+import sys, json, argparse, subprocess
+import numpy as np
+
+# Runs in a fresh interpreter per repeat so imports are really cold.
+# Times are seconds since the probe started.
+PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QObject, QEvent
+app = QApplication(sys.argv[:1])
+gui = main.SynapticGUI()
+t_window = time.perf_counter()
+painted = []
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not painted:
+            painted.append(time.perf_counter())
+        return False
+
+watcher = FirstPaint()
+gui.installEventFilter(watcher)
+gui.show()
+while not painted and time.perf_counter() - t_window < 10:
+    app.processEvents()
+t_paint = painted[0] if painted else float('nan')
+result = {'import': t_import - t0, 'window': t_window - t0, 'first_paint': t_paint - t0}
+tab = sys.argv[1] if len(sys.argv) > 1 else ''
+if tab:
+    t1 = time.perf_counter()
+    widget = main.load(main.TAB_TYPES[tab])()
+    result['first_tab'] = time.perf_counter() - t1
+print(json.dumps(result))
+"""
+
+
+def measure(repeats=5, tab=None, platform=None):
+    """Median startup times (s) over `repeats` cold starts."""
+    env = None
+    if platform:
+        import os
+        env = dict(os.environ, QT_QPA_PLATFORM=platform)
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', PROBE] + ([tab] if tab else []),
+                             capture_output=True, text=True, env=env, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: float(np.median([r[key] for r in runs])) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start time of the SynapticGUI launcher")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tab", help="also time creating the first tab of this type, e.g. 'BodyTab'")
+    parser.add_argument("--platform", help="Qt platform plugin, e.g. 'offscreen' for CI")
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH for tracking")
+    args = parser.parse_args()
+
+    result = measure(args.repeats, args.tab, args.platform)
+    for key, seconds in result.items():
+        print(f"{key:<12}{1e3 * seconds:>10.1f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,59 @@
+import time, argparse
+import numpy as np
+import torch
+from vae_for_emg import VAE
+from inference import prepare_encoder
+
+# name -> VAE keyword arguments; EMG windows are 8 channels x 64 samples (256 ms at 250 Hz)
+CONFIGS = {
+    'mnist-784-w1024': dict(input_shape=784, width=1024, depth=2),
+    'mlp-8x64-w256': dict(input_shape=(8, 64), width=256, depth=2),
+    'mlp-8x64-w128-d1': dict(input_shape=(8, 64), width=128, depth=1),
+    'conv-8x64-c16': dict(input_shape=(8, 64), width=128, depth=3, conv_channels=16),
+    'conv-16x64-c32': dict(input_shape=(16, 64), width=128, depth=3, conv_channels=32),
+}
+
+
+def time_encoder(encoder, input_size, batch, repeats):
+    """(p50, p99) seconds per call of the encoder on a (batch, input_size) input."""
+    x = torch.rand(batch, input_size)
+    times = []
+    with torch.inference_mode():
+        for _ in range(10):
+            encoder(x)
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            encoder(x)
+            times.append(time.perf_counter() - t0)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+
+def benchmark(configs, latent_dim=8, batch=32, repeats=200, script=False, quantize=False):
+    rows = []
+    for name, kwargs in configs.items():
+        vae = VAE(latent_dim, **kwargs)
+        params = sum(p.numel() for p in vae.parameters())
+        encoder = prepare_encoder(vae, script=script, quantize=quantize)
+        single = time_encoder(encoder, vae.input_size, 1, repeats)
+        batched = time_encoder(encoder, vae.input_size, batch, repeats)
+        rows.append((name, params, 1e3 * single[0], 1e3 * single[1], 1e3 * batched[0] / batch))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare VAE configs: size and encoder latency on CPU")
+    parser.add_argument("--latent", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1, help="torch CPU threads (0 = torch default)")
+    parser.add_argument("--script", action="store_true", help="TorchScript-trace the encoder")
+    parser.add_argument("--quantize", action="store_true", help="dynamic int8 Linear layers")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    print(f"{'config':<20}{'params':>12}{'1 window p50 (ms)':>20}{'p99 (ms)':>10}"
+          f"{f'per window @{args.batch} (ms)':>24}")
+    for name, params, p50, p99, per_window in benchmark(CONFIGS, args.latent, args.batch, args.repeats,
+                                                        args.script, args.quantize):
+        print(f"{name:<20}{params:>12,}{p50:>20.3f}{p99:>10.3f}{per_window:>24.4f}")
@@ -1,13 +1,49 @@
+import os
 import random
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene
+import time
+import numpy as np
+from stream_hub import stream_hub, sampling_rate
+from features import FeatureEngine, BodyMap
+from regions import REGION_FILE, SCENE_SIZE, DEFAULT_REGIONS, Region, RegionIndex, load_regions
+import instrumentation
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsItem, QToolTip
+)
 from PySide6.QtGui import (
     QPixmap, QPolygonF, QColor,
     QBrush, QPen, QPainter
 )
-from PySide6.QtCore import Qt, QPointF, QTimer, QRectF
+from PySide6.QtCore import Qt, QPointF, QTimer, QRectF, QEvent, Signal
+
+HEAT_LEVELS = 256
+
+
+def heat_lut(color=(255, 0, 0), levels=HEAT_LEVELS):
+    """One QBrush per level, alpha 0..255, so updates never build colors or brushes."""
+    r, g, b = color
+    return [QBrush(QColor(r, g, b, round(255 * i / (levels - 1)))) for i in range(levels)]
+
+
+# (path, width, height) -> scaled silhouette, shared by every BodyTab
+_silhouettes = {}
+
+
+def load_silhouette(path="body_silhouette.png", width=1000, height=2000):
+    key = (path, width, height)
+    if key not in _silhouettes:
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            print(f"Warning: Could not load {path}. Check file path!")
+            return pixmap
+        _silhouettes[key] = pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return _silhouettes[key]
+
 
 class BodyTab(QWidget):
-    def __init__(self, parent=None):
+    region_clicked = Signal(str)
+
+    def __init__(self, parent=None, body_map=None, feature='envelope', hop_ms=50,
+                 region_file=REGION_FILE):
         super().__init__(parent)
 
         layout = QVBoxLayout(self)
@@ -18,79 +54,154 @@ class BodyTab(QWidget):
         self.view = QGraphicsView(self.scene)
         layout.addWidget(self.view)
 
-        pixmap = QPixmap("body_silhouette.png")
-        if pixmap.isNull():
-            print("Warning: Could not load body_silhouette.png. Check file path!")
-        scaled = pixmap.scaled(1000, 2000, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.pixmap_item = self.scene.addPixmap(scaled)
+        self.pixmap_item = self.scene.addPixmap(load_silhouette())
         self.pixmap_item.setPos(0, 0)
+        # redraws under changed parts blit the silhouette at view size instead of rescaling it
+        self.pixmap_item.setTransformationMode(Qt.SmoothTransformation)
+        self.pixmap_item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
 
-        # container for our highlight items
+        # container for our highlight items; part_names/part_items keep insertion order
+        # so a whole level vector can be applied by index
         self.body_parts = {}
+        self.part_names = []
+        self.part_items = []
+        self._lut = heat_lut()
+        self._drawn = np.zeros(0, dtype=np.int64)  # LUT index currently shown per part
 
-        # 1) HEAD as an ellipse
-        head_rect = QRectF(435, 0, 130, 130)  
-        head_item = self.scene.addEllipse(head_rect)
-        head_item.setPen(QPen(Qt.transparent))
-        head_item.setBrush(QBrush(QColor(255, 0, 0, 0)))
-        head_item.setZValue(1)
-        self.body_parts["head"] = head_item
-
-        # 2) Other parts as polygons
-        self.create_body_part("left_arm", [
-            QPointF(390, 200), QPointF(430, 200),
-            QPointF(380, 400), QPointF(340, 400),
-        ])
-        self.create_body_part("right_arm", [
-            QPointF(570, 200), QPointF(610, 200),
-            QPointF(660, 400), QPointF(620, 400),
-        ])
-        self.create_body_part("torso", [
-            QPointF(430, 150), QPointF(570, 150),
-            QPointF(570, 600), QPointF(430, 600),
-        ])
-        self.create_body_part("left_leg", [
-            QPointF(430, 600), QPointF(500, 600),
-            QPointF(500, 900), QPointF(430, 900),
-        ])
-        self.create_body_part("right_leg", [
-            QPointF(500, 600), QPointF(570, 600),
-            QPointF(570, 900), QPointF(500, 900),
-        ])
-
-        self.scene.setSceneRect(0, 0, 1000, 2000)
+        # regions come from the file coordinate_picker.py writes, else the built-in outline;
+        # self.index answers hover, click and electrode lookups without scanning items
+        self.index = RegionIndex()
+        regions, electrodes = DEFAULT_REGIONS, None
+        if region_file and os.path.exists(region_file):
+            regions, electrodes = load_regions(region_file)
+        for region in regions:
+            self.add_region(region)
+
+        self.scene.setSceneRect(0, 0, *SCENE_SIZE)
         self.view.setRenderHints(self.view.renderHints() | QPainter.Antialiasing)
+        self.view.setMouseTracking(True)
+        self.view.viewport().installEventFilter(self)
+        self.hovered = None
+
+        # own cursor into the shared stream, independent of any time-series tab
+        self.subscription = stream_hub.subscribe(name='BodyTab')
+
+        # features are computed once per hop; channels drive parts through body_map
+        # (part -> channel list) using `feature`: 'envelope', 'rms' or a band name
+        self.hop_ms = hop_ms
+        self.engine = None
+        self.body_map = BodyMap(body_map or self.index.body_map(electrodes), feature)
+        self._map_index = np.array([self.part_names.index(p) if p in self.body_parts else -1
+                                    for p in self.body_map.parts], dtype=np.int64)
+        self._last_demo = 0.0
+        self._levels = None  # newest part levels not drawn yet
 
-        # timer for demo highlighting
+        # standalone refresh; SynapticGUI's frame scheduler stops it and calls poll()/render()
+        self.frame_interval = hop_ms / 1000
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_highlights)
-        self.timer.start(1000)
+        self.timer.start(hop_ms)
 
     def create_body_part(self, part_name, points):
-        poly = QPolygonF(points)
-        item = self.scene.addPolygon(poly)
-        item.setPen(QPen(Qt.transparent))
-        item.setBrush(QBrush(QColor(255, 0, 0, 0)))
+        self.add_region(Region(part_name, [(p.x(), p.y()) for p in points]))
+
+    def add_region(self, region):
+        if region.ellipse is not None:
+            item = self.scene.addEllipse(QRectF(*region.ellipse))
+        else:
+            item = self.scene.addPolygon(QPolygonF([QPointF(x, y) for x, y in region.polygon]))
+        self._add_part(region.name, item)
+        self.index.add(region)
+
+    def _add_part(self, part_name, item):
+        item.setPen(QPen(Qt.NoPen))
+        item.setBrush(self._lut[0])
         item.setZValue(1)
         self.body_parts[part_name] = item
+        self.part_names.append(part_name)
+        self.part_items.append(item)
+        self._drawn = np.append(self._drawn, 0)
+
+    def set_levels(self, values, indices=None):
+        """
+        Show 0..1 `values` for all parts in `part_names` order, or for the parts
+        at `indices`. NaN leaves a part unchanged; only parts whose color level
+        actually changes get a new brush (and so a repaint).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        indices = np.arange(len(values)) if indices is None else np.asarray(indices)
+        valid = ~np.isnan(values)
+        values, indices = values[valid], indices[valid]
+        levels = np.rint(np.clip(values, 0.0, 1.0) * (HEAT_LEVELS - 1)).astype(np.int64)
+        changed = np.flatnonzero(levels != self._drawn[indices])
+        for i in changed:
+            self.part_items[indices[i]].setBrush(self._lut[levels[i]])
+        self._drawn[indices[changed]] = levels[changed]
 
     def highlight_part(self, part_name, value):
         if part_name not in self.body_parts:
             print(f"No body part named '{part_name}'")
             return
-        value = max(0.0, min(1.0, value))
-        alpha = int(255 * value)
-        color = QColor(255, 0, 0, alpha)
-        self.body_parts[part_name].setBrush(QBrush(color))
+        self.set_levels([value], [self.part_names.index(part_name)])
 
     def clear_highlights(self):
-        for item in self.body_parts.values():
-            item.setBrush(QBrush(QColor(255, 0, 0, 0)))
+        self.set_levels(np.zeros(len(self.part_items)))
+
+    def _ensure_engine(self, n_channels):
+        rate = stream_hub.sampling_rate or sampling_rate
+        if (self.engine is None or self.engine.n_channels != n_channels
+                or self.engine.sampling_rate != rate):
+            self.engine = FeatureEngine(n_channels, rate, hop_s=self.hop_ms / 1000)
+        return self.engine
+
+    def poll(self):
+        """Feed new samples to the feature engine; runs even while the tab is hidden."""
+        batch = self.subscription.read()
+        if batch is None:
+            return False
+        eeg, _, ts = batch
+        engine = self._ensure_engine(eeg.shape[0])
+        with instrumentation.timed('process.features'):
+            updated = engine.push(eeg, ts)
+        if updated:
+            self._levels = self.body_map.vector(engine)
+        return updated
+
+    def render(self):
+        if self.engine is None:
+            if time.monotonic() - self._last_demo >= 1.0:
+                # no stream yet: random demo once a second
+                self._last_demo = time.monotonic()
+                self.set_levels([random.random() for _ in self.part_items])
+            return
+        if self._levels is not None:
+            shown = self._map_index >= 0
+            self.set_levels(self._levels[shown], self._map_index[shown])
+            self._levels = None
 
     def update_highlights(self):
-        # random demo; replace with real data
-        for part in self.body_parts:
-            self.highlight_part(part, random.random())
+        self.poll()
+        self.render()
+
+    def shutdown(self):
+        self.timer.stop()
+
+    def eventFilter(self, obj, event):
+        if obj is self.view.viewport() and event.type() in (QEvent.MouseMove, QEvent.MouseButtonPress):
+            pos = self.view.mapToScene(event.position().toPoint())
+            i = self.index.index_at(pos.x(), pos.y())
+            name = self.part_names[i] if i >= 0 else None
+            if event.type() == QEvent.MouseButtonPress:
+                if name is not None and event.button() == Qt.LeftButton:
+                    self.region_clicked.emit(name)
+            elif name != self.hovered:
+                self.hovered = name
+                if name is None:
+                    QToolTip.hideText()
+                else:
+                    level = self._drawn[i] / (HEAT_LEVELS - 1)
+                    QToolTip.showText(event.globalPosition().toPoint(), f"{name}: {level:.2f}", self.view)
+        return super().eventFilter(obj, event)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
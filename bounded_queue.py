@@ -0,0 +1,119 @@
+import numpy as np
+
+from collections import deque
+from queue import Empty
+from threading import Condition
+from weakref import WeakValueDictionary
+
+POLICIES = ('block', 'drop-oldest', 'coalesce')
+
+# ─── Pipeline stats registry ────────────────────────────────────
+# Every bounded queue and hub subscription registers itself here under a
+# readable name so the GUI can show depth and drop counters in one place.
+# Entries disappear when their owner is garbage collected.
+
+_registry = WeakValueDictionary()
+
+
+def register(name, obj):
+    """Register `obj` (anything with a stats() method) and return the unique name used."""
+    base, n = name, 2
+    while name in _registry:
+        name = f'{base} #{n}'
+        n += 1
+    _registry[name] = obj
+    return name
+
+
+def pipeline_stats():
+    """{name: {'enqueued', 'dropped', 'depth', 'max_depth', 'capacity', 'policy'}}"""
+    return {name: obj.stats() for name, obj in list(_registry.items())}
+
+
+def merge_chunks(a, b):
+    """Coalesce two (eeg, aux, ts) chunks into one."""
+    return (np.concatenate((a[0], b[0]), axis=1),
+            np.concatenate((a[1], b[1]), axis=1),
+            np.concatenate((a[2], b[2])))
+
+
+class BoundedQueue:
+    """
+    Queue with at most `maxsize` items and an explicit policy for when it is full:
+
+    - 'block':       put() waits for room; after `timeout` the item is dropped
+    - 'drop-oldest': the oldest item is discarded and counted as dropped
+    - 'coalesce':    the new item is merged into the newest queued one with
+                     `merge`, so nothing is lost but the item count stays bounded
+
+    put() returns False when the item was dropped. close() wakes the consumer:
+    get() returns None once a closed queue is empty. Depth, enqueued, dropped
+    and max-depth counters are kept for pipeline_stats().
+    """
+
+    def __init__(self, maxsize, policy='block', name='queue', merge=merge_chunks):
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown queue policy {policy!r}; expected one of {POLICIES}')
+        self.maxsize = maxsize
+        self.policy = policy
+        self.merge = merge
+        self._items = deque()
+        self._cond = Condition()
+        self.closed = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.name = register(name, self)
+
+    def put(self, item, timeout=None):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.policy == 'block':
+                    if not self._cond.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                        self.enqueued += 1
+                        self.dropped += 1
+                        return False
+                elif self.policy == 'drop-oldest':
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self._items[-1] = self.merge(self._items[-1], item)
+                    self.enqueued += 1
+                    self.coalesced += 1
+                    self._cond.notify_all()
+                    return True
+            self._items.append(item)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def get(self, block=True, timeout=None):
+        with self._cond:
+            if not block:
+                if not self._items and not self.closed:
+                    raise Empty
+            elif not self._cond.wait_for(lambda: self._items or self.closed, timeout):
+                raise Empty
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        return len(self._items)
+
+    def stats(self):
+        return {'enqueued': self.enqueued, 'dropped': self.dropped,
+                'depth': len(self._items), 'max_depth': self.max_depth,
+                'capacity': self.maxsize, 'policy': self.policy}
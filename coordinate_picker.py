@@ -1,10 +1,18 @@
+import os
 import sys
-from PySide6.QtWidgets import QApplication, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PySide6.QtGui import QPixmap, QMouseEvent, QPainter
-from PySide6.QtCore import Qt, QPointF
+from PySide6.QtWidgets import (
+    QApplication, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QInputDialog
+)
+from PySide6.QtGui import QPixmap, QMouseEvent, QPainter, QPolygonF, QPen, QBrush, QColor
+from PySide6.QtCore import Qt, QPointF, QRectF
+from regions import REGION_FILE, DEFAULT_REGIONS, Region, load_regions, save_regions
+
+HELP = ("Click: add point | Enter/right-click: finish region | Backspace: undo point | "
+        "Esc: discard | Shift+click: place electrode | Ctrl+S: save")
+
 
 class CoordinatePicker(QGraphicsView):
-    def __init__(self, image_path):
+    def __init__(self, image_path, region_file=REGION_FILE):
         super().__init__()
 
         self.scene = QGraphicsScene(self)
@@ -23,15 +31,90 @@ class CoordinatePicker(QGraphicsView):
 
         self.fitInView(self.scene.itemsBoundingRect(), Qt.KeepAspectRatio)
 
+        # start from the existing region file so regions can be added to it
+        self.region_file = region_file
+        self.regions, self.electrodes = list(DEFAULT_REGIONS), {}
+        if os.path.exists(region_file):
+            self.regions, self.electrodes = load_regions(region_file)
+        self.points = []
+        self.preview = self.scene.addPolygon(QPolygonF(), QPen(Qt.yellow, 2))
+        self.preview.setZValue(2)
+        for region in self.regions:
+            self.draw_region(region)
+        for channel, (x, y) in self.electrodes.items():
+            self.draw_electrode(channel, x, y)
+
+    def draw_region(self, region):
+        pen, brush = QPen(Qt.blue, 2), QBrush(QColor(0, 0, 255, 40))
+        if region.ellipse is not None:
+            item = self.scene.addEllipse(QRectF(*region.ellipse), pen, brush)
+        else:
+            item = self.scene.addPolygon(QPolygonF([QPointF(x, y) for x, y in region.polygon]), pen, brush)
+        item.setToolTip(region.name)
+        item.setZValue(1)
+
+    def draw_electrode(self, channel, x, y):
+        item = self.scene.addEllipse(QRectF(x - 6, y - 6, 12, 12), QPen(Qt.black), QBrush(Qt.green))
+        item.setToolTip(f"channel {channel}")
+        item.setZValue(3)
+
     def mousePressEvent(self, event: QMouseEvent):
+        scene_pos = self.mapToScene(event.pos())
+        x, y = int(scene_pos.x()), int(scene_pos.y())
         if event.button() == Qt.LeftButton:
-            scene_pos = self.mapToScene(event.pos())
-            print(f"Clicked at: ({int(scene_pos.x())}, {int(scene_pos.y())})")
+            print(f"Clicked at: ({x}, {y})")
+            if event.modifiers() & Qt.ShiftModifier:
+                self.add_electrode(x, y)
+            else:
+                self.points.append(QPointF(x, y))
+                self.preview.setPolygon(QPolygonF(self.points))
+        elif event.button() == Qt.RightButton:
+            self.finish_region()
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            self.finish_region()
+        elif event.key() == Qt.Key_Backspace and self.points:
+            self.points.pop()
+            self.preview.setPolygon(QPolygonF(self.points))
+        elif event.key() == Qt.Key_Escape:
+            self.points = []
+            self.preview.setPolygon(QPolygonF())
+        elif event.key() == Qt.Key_S and event.modifiers() & Qt.ControlModifier:
+            self.save()
+        else:
+            super().keyPressEvent(event)
+
+    def finish_region(self):
+        if len(self.points) < 3:
+            print("A region needs at least 3 points")
+            return
+        name, ok = QInputDialog.getText(self, "New region", "Region name:")
+        if not ok or not name:
+            return
+        region = Region(name, [(p.x(), p.y()) for p in self.points])
+        # a new region with an existing name replaces it
+        self.regions = [r for r in self.regions if r.name != name] + [region]
+        self.draw_region(region)
+        self.points = []
+        self.preview.setPolygon(QPolygonF())
+        print(f"Region '{name}': {region.to_dict()['polygon']}")
+
+    def add_electrode(self, x, y):
+        channel, ok = QInputDialog.getInt(self, "Electrode", "Channel:", len(self.electrodes), 0)
+        if ok:
+            self.electrodes[channel] = (x, y)
+            self.draw_electrode(channel, x, y)
+
+    def save(self):
+        save_regions(self.region_file, self.regions, self.electrodes)
+        print(f"Saved {len(self.regions)} regions and {len(self.electrodes)} electrodes to {self.region_file}")
 
 def main():
     app = QApplication(sys.argv)
-    picker = CoordinatePicker("body_silhouette.png")
-    picker.setWindowTitle("Coordinate Picker - Click to Get (x, y)")
+    region_file = sys.argv[1] if len(sys.argv) > 1 else REGION_FILE
+    picker = CoordinatePicker("body_silhouette.png", region_file)
+    picker.setWindowTitle(f"Coordinate Picker - {HELP}")
     picker.resize(1000, 2000)
     picker.show()
     sys.exit(app.exec())
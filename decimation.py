@@ -0,0 +1,82 @@
+import numpy as np
+
+
+# ─── Display-side decimation ────────────────────────────────────
+# All functions take shared (n,) times and (n_channels, n) samples and
+# return (times, samples) small enough to draw in `n_columns` pixels.
+
+
+def _bucket_edges(n, n_buckets):
+    return np.linspace(0, n, n_buckets + 1).astype(np.intp)
+
+
+def minmax_decimate(times, samples, n_columns):
+    """
+    Reduce each channel to a min/max envelope with one bucket per pixel column.
+
+    Output has 2 * n_columns points per channel (the min and the max of each
+    bucket), so the drawn trace keeps every spike that a full-resolution plot
+    would show. Inputs that are already small are returned unchanged.
+    """
+    n = len(times)
+    if n_columns <= 0 or n <= 2 * n_columns:
+        return times, samples
+    edges = _bucket_edges(n, n_columns)
+    starts, ends = edges[:-1], edges[1:] - 1
+    lo = np.minimum.reduceat(samples, starts, axis=1)
+    hi = np.maximum.reduceat(samples, starts, axis=1)
+
+    out_t = np.empty(2 * n_columns, dtype=times.dtype)
+    out_t[0::2] = times[starts]
+    out_t[1::2] = times[ends]
+    out_y = np.empty((samples.shape[0], 2 * n_columns), dtype=samples.dtype)
+    out_y[:, 0::2] = lo
+    out_y[:, 1::2] = hi
+    return out_t, out_y
+
+
+def lttb_decimate(times, samples, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling to `n_out` points per channel.
+
+    Keeps the visual shape better than min/max for smooth signals but picks a
+    different sample index per channel, so the returned times are (n_channels,
+    n_out) rather than shared.
+    """
+    n = len(times)
+    n_ch = samples.shape[0]
+    if n_out < 3 or n <= n_out:
+        return np.broadcast_to(times, (n_ch, n)), samples
+
+    # first and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = _bucket_edges(n - 2, n_out - 2) + 1
+    rows = np.arange(n_ch)
+    picked = np.empty((n_ch, n_out), dtype=np.intp)
+    picked[:, 0] = 0
+    picked[:, -1] = n - 1
+
+    a = np.zeros(n_ch, dtype=np.intp)
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket (or the final point)
+        if b + 2 < len(edges):
+            nlo, nhi = edges[b + 1], edges[b + 2]
+        else:
+            nlo, nhi = n - 1, n
+        cx = times[nlo:nhi].mean()
+        cy = samples[:, nlo:nhi].mean(axis=1)
+
+        ax, ay = times[a], samples[rows, a]
+        bx, by = times[lo:hi], samples[:, lo:hi]
+        area = np.abs((ax - cx)[:, None] * (by - ay[:, None])
+                      - (ax[:, None] - bx[None, :]) * (cy - ay)[:, None])
+        a = lo + np.argmax(area, axis=1)
+        picked[:, b + 1] = a
+
+    return times[picked], samples[rows[:, None], picked]
+
+
+DECIMATORS = {
+    "minmax": minmax_decimate,
+    "lttb": lttb_decimate,
+}
@@ -0,0 +1,168 @@
+import numpy as np
+
+
+def _signal():
+    # scipy.signal takes most of a second to import; load it with the first filter
+    from scipy import signal
+    return signal
+
+# ─── Streaming filter stages ────────────────────────────────────
+# Every stage maps an (n_channels, n) chunk to an (n_channels, n) chunk and
+# keeps whatever state it needs between calls, so each chunk costs O(n) and
+# the output is identical to filtering the whole recording in one go.
+# State is (re)initialised from the first chunk it sees, or when the channel
+# count changes.
+
+
+class Stage:
+    def process(self, x):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class SosFilter(Stage):
+    """IIR filter in second-order sections; the per-channel `zi` carries across chunks."""
+
+    def __init__(self, sos):
+        self.sos = np.asarray(sos, dtype=np.float64)
+        self.zi = None
+        signal = _signal()
+        self._sosfilt, self._sosfilt_zi = signal.sosfilt, signal.sosfilt_zi
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, x):
+        if x.shape[1] == 0:
+            return x
+        if self.zi is None or self.zi.shape[1] != x.shape[0]:
+            # start in steady state for the first sample, avoiding a step transient
+            self.zi = self._sosfilt_zi(self.sos)[:, None, :] * x[None, :, :1]
+        y, self.zi = self._sosfilt(self.sos, x, axis=1, zi=self.zi)
+        return y
+
+
+class Notch(SosFilter):
+    """Mains notch at `freq` (50/60 Hz) and optionally its harmonics below Nyquist."""
+
+    def __init__(self, fs, freq=50.0, quality=30.0, harmonics=1):
+        sections = []
+        for k in range(1, harmonics + 1):
+            f = k * freq
+            if f >= fs / 2:
+                break
+            b, a = _signal().iirnotch(f, quality, fs=fs)
+            sections.append(_signal().tf2sos(b, a))
+        super().__init__(np.vstack(sections) if sections else [[1, 0, 0, 1, 0, 0]])
+
+
+class Bandpass(SosFilter):
+    """Butterworth band-pass; `high` is clipped below Nyquist."""
+
+    def __init__(self, fs, low=1.0, high=45.0, order=4):
+        high = min(high, 0.45 * fs)
+        if high <= low:
+            raise ValueError(f'{low}-{high} Hz band-pass needs a sampling rate above {low / 0.45:.1f} Hz')
+        super().__init__(_signal().butter(order, [low, high], btype='bandpass', fs=fs, output='sos'))
+
+
+class Highpass(SosFilter):
+    def __init__(self, fs, cutoff=1.0, order=2):
+        super().__init__(_signal().butter(order, cutoff, btype='highpass', fs=fs, output='sos'))
+
+
+class Lowpass(SosFilter):
+    def __init__(self, fs, cutoff, order=2):
+        super().__init__(_signal().butter(order, cutoff, btype='lowpass', fs=fs, output='sos'))
+
+
+class Detrend(Stage):
+    """
+    Remove the slowly moving baseline: subtract an exponential moving average
+    with time constant `tau` seconds (a one-pole filter, so O(n) per chunk).
+    """
+
+    def __init__(self, fs, tau=1.0):
+        self.alpha = 1.0 - np.exp(-1.0 / (tau * fs))
+        self.b = np.array([self.alpha])
+        self.a = np.array([1.0, self.alpha - 1.0])
+        self.zi = None
+        self._lfilter = _signal().lfilter
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, x):
+        if x.shape[1] == 0:
+            return x
+        if self.zi is None or self.zi.shape[0] != x.shape[0]:
+            self.zi = (1.0 - self.alpha) * x[:, :1]
+        baseline, self.zi = self._lfilter(self.b, self.a, x, axis=1, zi=self.zi)
+        return x - baseline
+
+
+class CommonAverageReference(Stage):
+    """Subtract the mean over channels from every channel, sample by sample."""
+
+    def process(self, x):
+        if x.shape[0] < 2:
+            return x
+        return x - x.mean(axis=0, keepdims=True)
+
+
+class FilterChain(Stage):
+    """Run stages in order; a chain is itself a stage, so chains compose."""
+
+    def __init__(self, stages=()):
+        self.stages = list(stages)
+
+    def process(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        for stage in self.stages:
+            x = stage.process(x)
+        return x
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+
+EEG_BAND = (1, 45)
+EMG_BAND = (20, 450)
+
+# display presets: name -> factory(fs) returning a FilterChain (None = raw)
+PRESETS = {
+    'Raw': None,
+    'EEG (50 Hz mains)': lambda fs: FilterChain([Notch(fs, 50), Bandpass(fs, *EEG_BAND),
+                                                 CommonAverageReference()]),
+    'EEG (60 Hz mains)': lambda fs: FilterChain([Notch(fs, 60), Bandpass(fs, *EEG_BAND),
+                                                 CommonAverageReference()]),
+    'EMG (50 Hz mains)': lambda fs: FilterChain([Notch(fs, 50, harmonics=3),
+                                                 Bandpass(fs, *EMG_BAND)]),
+    'EMG (60 Hz mains)': lambda fs: FilterChain([Notch(fs, 60, harmonics=3),
+                                                 Bandpass(fs, *EMG_BAND)]),
+    'Detrend only': lambda fs: FilterChain([Detrend(fs)]),
+}
+
+# presets with a band-pass need its (clipped) upper edge 0.45 * fs above the lower one
+_LOW_EDGE = {'EEG (50 Hz mains)': EEG_BAND[0], 'EEG (60 Hz mains)': EEG_BAND[0],
+             'EMG (50 Hz mains)': EMG_BAND[0], 'EMG (60 Hz mains)': EMG_BAND[0]}
+
+
+def preset_supported(preset, fs):
+    return 0.45 * fs > _LOW_EDGE.get(preset, 0)
+
+
+def available_presets(fs):
+    """Presets that can run at sampling rate `fs`."""
+    return [name for name in PRESETS if preset_supported(name, fs)]
+
+
+def make_chain(preset, fs):
+    if not preset_supported(preset, fs):
+        raise ValueError(f"Filter preset '{preset}' needs a sampling rate above "
+                         f"{_LOW_EDGE[preset] / 0.45:.1f} Hz (got {fs} Hz)")
+    factory = PRESETS[preset]
+    return factory(fs) if factory else None
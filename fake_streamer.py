@@ -1,65 +1,34 @@
-import time
-import numpy as np
-import pandas as pd
-from math import pi
+import time, argparse
 from threading import Thread
-from recorder import data_queue, stop_event
+from recorder import run_source, stop_event
+from sources import GeneratorSource, ReplaySource
 from main import main  # your SynapticGUI launcher
 
-# these will accumulate all the fake data
-eeg_records = []
-aux_records = []
-ts_records  = []
 
-def fake_stream():
-    """
-    Generate a synthetic EEG (8 channels) + aux (3 channels) sine/cosine stream
-    at 10 Hz, pushing into data_queue.
-    """
-    n_eeg = 8
-    n_aux = 3
-    t = 0.0
-    dt = 0.1  # 10 Hz
+def fake_source(args):
+    """Build the synthetic or replay source described by the command line."""
+    if args.replay:
+        return ReplaySource(args.replay, speed=args.speed, loop=args.loop)
+    return GeneratorSource(n_eeg=args.channels, n_aux=3, sampling_rate=args.rate,
+                           speed=args.speed)
 
-    while not stop_event.is_set():
-        # one column of data
-        eeg = np.sin(np.linspace(0, 2*pi, n_eeg) + t).reshape(n_eeg, 1)
-        aux = np.cos(np.linspace(0, 2*pi, n_aux) + t).reshape(n_aux, 1)
-        ts  = np.array([t])
-
-        # push to GUI queue
-        data_queue.put((eeg, aux, ts))
-
-        # record for CSV
-        eeg_records.append(eeg[:,0])
-        aux_records.append(aux[:,0])
-        ts_records.append(t)
-
-        t += dt
-        time.sleep(dt)
-
-    # once stop_event is set (GUI closed), save to CSV
-    eeg_arr = np.vstack(eeg_records).T   # shape (8, N)
-    aux_arr = np.vstack(aux_records).T   # shape (3, N)
-
-    # EEG CSV
-    df_eeg = pd.DataFrame(
-        eeg_arr.T,
-        columns=[f"EEG_Channel_{i}" for i in range(eeg_arr.shape[0])]
-    )
-    df_eeg.to_csv("fake_eeg.csv", index=False)
-
-    # Aux CSV
-    df_aux = pd.DataFrame(
-        aux_arr.T,
-        columns=[f"Aux_Channel_{i}" for i in range(aux_arr.shape[0])]
-    )
-    df_aux.to_csv("fake_aux.csv", index=False)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", metavar="PATH",
+                        help="stream a recorded session (.h5/.bin/.npy/.csv) instead of the generator")
+    parser.add_argument("--channels", type=int, default=8, help="generator EEG channels")
+    parser.add_argument("--rate", type=int, default=250, help="generator sampling rate (Hz)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = real time, N = N x faster, 0 = as fast as possible")
+    parser.add_argument("--loop", action="store_true", help="restart the replay when it ends")
+    parser.add_argument("--record", action="store_true",
+                        help="record the fake stream like a real session (see recorder.save_file)")
+    args = parser.parse_args()
+
     stop_event.clear()
-    Thread(target=fake_stream, daemon=True).start()
+    Thread(target=run_source, args=(fake_source(args), args.record), daemon=True).start()
     main()
     stop_event.set()
     time.sleep(0.2)
-    print("Fake stream ended; CSVs written: fake_eeg.csv, fake_aux.csv")
\ No newline at end of file
+    print("Fake stream ended")
@@ -0,0 +1,174 @@
+import time
+import numpy as np
+
+from ring_buffer import RingBuffer
+from dsp import Highpass, Lowpass
+
+# (low, high) Hz; bands above Nyquist are dropped
+BANDS = {
+    'delta': (1, 4),
+    'theta': (4, 8),
+    'alpha': (8, 13),
+    'beta': (13, 30),
+    'gamma': (30, 45),
+    'emg': (20, 150),
+}
+
+
+class FeatureEngine:
+    """
+    Sliding-window features over a multi-channel stream.
+
+    push() takes (n_channels, n) batches of any size. Every `hop_s` seconds the
+    last `window_s` seconds are re-analysed:
+
+    - band_power: (n_channels, n_bands) Hann-windowed periodogram power per
+      band, averaged over the last `average` hops (Welch with overlapping windows)
+    - rms:        (n_channels,) RMS of the mean-removed window
+    - envelope:   (n_channels,) EMG envelope, i.e. high-passed, rectified and
+                  low-passed; filtered sample by sample so it is never a hop late
+
+    The window, taper, FFT scratch and band bin ranges are allocated once, so
+    a hop costs one rfft over the window and no allocations besides its result.
+    """
+
+    def __init__(self, n_channels, sampling_rate, window_s=0.5, hop_s=0.05,
+                 bands=BANDS, average=4, envelope_hz=5.0, envelope_highpass=20.0):
+        self.n_channels = n_channels
+        self.sampling_rate = sampling_rate
+        self.window = max(8, int(window_s * sampling_rate))
+        self.hop = max(1, int(hop_s * sampling_rate))
+        self.buffer = RingBuffer(n_channels, self.window)
+
+        # FFT setup: taper, scratch buffer and the bin slice of each band
+        self.taper = np.hanning(self.window)
+        self.scale = 2.0 / (sampling_rate * np.sum(self.taper ** 2))
+        self._scratch = np.empty((n_channels, self.window))
+        freqs = np.fft.rfftfreq(self.window, 1.0 / sampling_rate)
+        nyquist = sampling_rate / 2
+        self.band_names = [name for name, (lo, _) in bands.items() if lo < nyquist]
+        self._band_bins = []
+        for name in self.band_names:
+            lo, hi = bands[name]
+            idx = np.flatnonzero((freqs >= lo) & (freqs < min(hi, nyquist)))
+            self._band_bins.append(slice(idx[0], idx[-1] + 1) if len(idx) else slice(0, 0))
+        self._history = np.zeros((max(1, average), n_channels, len(self.band_names)))
+        self._hops = 0
+
+        # EMG envelope: high-pass, rectify, low-pass, with state across batches
+        self._env_hp = Highpass(sampling_rate, min(envelope_highpass, 0.4 * sampling_rate))
+        self._env_lp = Lowpass(sampling_rate, min(envelope_hz, 0.4 * sampling_rate))
+
+        self.band_power = np.zeros((n_channels, len(self.band_names)))
+        self.rms = np.zeros(n_channels)
+        self.envelope = np.zeros(n_channels)
+        self.timestamp = None
+        self.latency = 0.0  # seconds spent in the last push()
+        self._since_hop = 0
+
+    def reset(self):
+        self.buffer.clear()
+        self._env_hp.reset()
+        self._env_lp.reset()
+        self._history[:] = 0
+        self._hops = 0
+        self._since_hop = 0
+        self.timestamp = None
+
+    def push(self, samples, times):
+        """Add a batch; return True when a hop completed and the features were refreshed."""
+        t0 = time.perf_counter()
+        samples = np.asarray(samples, dtype=np.float64)
+        n = samples.shape[1]
+        if n == 0:
+            return False
+        self.buffer.append(samples, times)
+        env = self._env_lp.process(np.abs(self._env_hp.process(samples)))
+        self.envelope = np.maximum(env[:, -1], 0.0)
+
+        self._since_hop += n
+        updated = self._since_hop >= self.hop and len(self.buffer) == self.window
+        if updated:
+            # only the newest window matters, however many hops the batch spanned
+            self._since_hop %= self.hop
+            self._analyse()
+            self.timestamp = float(np.asarray(times)[-1])
+        self.latency = time.perf_counter() - t0
+        return updated
+
+    def _analyse(self):
+        _, x = self.buffer.latest()
+        mean = x.mean(axis=1, keepdims=True)
+        np.subtract(x, mean, out=self._scratch)
+        self.rms = np.sqrt(np.mean(self._scratch ** 2, axis=1))
+        self._scratch *= self.taper
+        spectrum = np.fft.rfft(self._scratch, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        slot = self._history[self._hops % len(self._history)]
+        for b, bins in enumerate(self._band_bins):
+            slot[:, b] = power[:, bins].sum(axis=1) * self.scale
+        self._hops += 1
+        self.band_power = self._history[:min(self._hops, len(self._history))].mean(axis=0)
+
+    def feature(self, name):
+        """(n_channels,) values of 'rms', 'envelope' or a band name."""
+        if name == 'rms':
+            return self.rms
+        if name == 'envelope':
+            return self.envelope
+        return self.band_power[:, self.band_names.index(name)]
+
+
+# ─── Channel → body-part mapping ────────────────────────────────
+# part name -> channel indices whose feature values are averaged
+
+DEFAULT_BODY_MAP = {
+    'head': [0],
+    'left_arm': [1],
+    'right_arm': [2],
+    'torso': [3],
+    'left_leg': [4],
+    'right_leg': [5],
+}
+
+
+class BodyMap:
+    """
+    Turn one feature of a FeatureEngine into 0..1 levels per body part.
+
+    Values are scaled by the running peak over all channels, which decays by
+    `decay` per update, so levels compare channels against each other and
+    against recent activity instead of only the current hop's loudest channel.
+    """
+
+    def __init__(self, mapping=None, feature='envelope', decay=0.995, floor=1e-9):
+        self.mapping = dict(mapping or DEFAULT_BODY_MAP)
+        self.parts = list(self.mapping)
+        self.feature = feature
+        self.decay = decay
+        self.floor = floor
+        self.peak = floor
+        self._weights = None
+
+    def _matrix(self, n_channels):
+        # (parts, channels) averaging matrix, rebuilt only when the channel count changes
+        if self._weights is None or self._weights.shape[1] != n_channels:
+            weights = np.zeros((len(self.parts), n_channels))
+            for i, part in enumerate(self.parts):
+                channels = [c for c in self.mapping[part] if c < n_channels]
+                if channels:
+                    np.add.at(weights[i], channels, 1.0 / len(channels))
+            self._weights = weights
+            self._mapped = weights.any(axis=1)
+        return self._weights
+
+    def vector(self, engine):
+        """Levels of all `parts` as one array; NaN for parts with no channel in the stream."""
+        values = engine.feature(self.feature)
+        self.peak = max(self.peak * self.decay, float(values.max()), self.floor)
+        levels = self._matrix(len(values)) @ values / self.peak
+        levels[~self._mapped] = np.nan
+        return levels
+
+    def levels(self, engine):
+        return {part: float(v) for part, v in zip(self.parts, self.vector(engine)) if v == v}
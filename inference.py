@@ -0,0 +1,260 @@
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+
+from collections import deque
+from threading import Thread, Event
+from numpy.lib.stride_tricks import sliding_window_view
+from bounded_queue import BoundedQueue
+import instrumentation
+from vae_for_emg import VAE, INPUT_SIZE
+from training_data import ChannelScaler
+
+
+def flatten_windows(windows, size=INPUT_SIZE):
+    """
+    (k, n_channels, window) -> (k, size), zero-padded or truncated to the model
+    input. Only the legacy flat model relies on the padding; models with a
+    (channels, samples) input_shape get exactly that many values.
+    """
+    flat = windows.reshape(len(windows), -1)
+    if flat.shape[1] == size:
+        return flat
+    out = np.zeros((len(flat), size), dtype=flat.dtype)
+    n = min(size, flat.shape[1])
+    out[:, :n] = flat[:, :n]
+    return out
+
+
+class _EncoderMean(nn.Module):
+    """Just the part of the VAE inference needs: input -> latent mean."""
+
+    def __init__(self, vae):
+        super().__init__()
+        self.vae = vae
+
+    def forward(self, x):
+        return self.vae.encode(x)[0]
+
+
+def prepare_encoder(vae, script=False, quantize=False, example=None):
+    """
+    Wrap `vae` for inference: eval mode, encoder mean only, optionally
+    dynamically int8-quantized Linear layers (CPU) and/or TorchScript-traced.
+    """
+    encoder = _EncoderMean(vae.eval())
+    if quantize:
+        encoder = torch.ao.quantization.quantize_dynamic(encoder, {nn.Linear}, dtype=torch.qint8)
+    if script:
+        if example is None:
+            # trace on the model's device, or the traced graph pins CPU tensors
+            example = torch.zeros(1, vae.input_size, device=next(vae.parameters()).device)
+        with torch.inference_mode():
+            encoder = torch.jit.trace(encoder, example)
+    return encoder
+
+
+def load_vae(path, latent_dim=None, device='cpu'):
+    """
+    Load a VAE from a train() checkpoint, a state_dict or a pickled model.
+    `latent_dim` defaults to what the checkpoint or weights say.
+
+    Returns (vae, normalization): normalization is the training dataset's
+    {'normalize', 'stats', 'channels'} from a train() checkpoint, else None.
+    """
+    state = torch.load(path, map_location=device, weights_only=False)
+    if isinstance(state, nn.Module):
+        return state.to(device), None
+    config, normalization = {}, None
+    if 'model' in state:
+        config = state.get('config', {})
+        latent_dim = state.get('latent_dim', latent_dim)
+        normalization = state.get('normalization')
+        state = state['model']
+    if latent_dim is None:
+        latent_dim = state['z_mean_layer.weight'].shape[0]
+    vae = VAE(latent_dim, **config)
+    vae.load_state_dict(state)
+    return vae.to(device), normalization
+
+
+def window_preprocess(normalization, input_size=INPUT_SIZE):
+    """
+    VAEInferenceWorker `preprocess` that scales live windows the way the
+    training SessionWindowDataset did (see load_vae), then flattens them.
+    """
+    if not normalization or normalization.get('normalize') is None:
+        return lambda w: flatten_windows(w, input_size)
+    scaler = ChannelScaler(normalization['normalize'], normalization['stats'])
+    return lambda w: flatten_windows(scaler(w), input_size)
+
+
+class VAEInferenceWorker:
+    """
+    Background thread that encodes sliding windows of the live stream.
+
+    Windows of `window_samples` samples (default: the model's (channels,
+    samples) input shape, else as many as fit its flat input) are cut every
+    `hop_samples` from a
+    StreamHub subscription. They are batched up to `batch_size`, or whatever
+    has accumulated after `max_wait_ms`, and run through the encoder under
+    torch.inference_mode().
+
+    Results go into `self.results`, a drop-oldest BoundedQueue of
+    (window_end_times (k,), latent_means (k, latent_dim)) that the GUI drains
+    from a QTimer, so the Qt thread never waits for the model. `self.latest`
+    always holds the newest pair. stats() reports per-batch latency and
+    throughput.
+
+    A model with a (channels, samples) input_shape only accepts streams with
+    that many channels (after `channels`); anything else raises ValueError
+    here if the hub is already configured, or stops the worker with
+    `self.error` set if the stream changes later.
+    """
+
+    def __init__(self, vae, hub, channels=None, window_samples=None, hop_samples=None,
+                 batch_size=32, max_wait_ms=50, device='cpu', script=False, quantize=False,
+                 preprocess=None, poll_interval=0.005, name='VAE'):
+        self.hub = hub
+        self.channels = channels
+        self.window_samples = window_samples
+        self.hop_samples = hop_samples
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.device = torch.device(device)
+        self.input_size = vae.input_size
+        self.n_channels = vae.input_shape[0] if len(vae.input_shape) == 2 else None
+        if window_samples is None and self.n_channels is not None:
+            self.window_samples = vae.input_shape[1]
+        # (k, n_channels, window) float32 array -> (k, input_size) array
+        self.preprocess = preprocess or (lambda w: flatten_windows(w, self.input_size))
+        self.poll_interval = poll_interval
+        self.name = name
+        if hub.n_eeg:
+            self.check_channels(len(channels) if channels is not None else hub.n_eeg)
+
+        vae = vae.to(self.device)
+        self.encoder = prepare_encoder(vae, script, quantize and self.device.type == 'cpu')
+
+        self.subscription = hub.subscribe(name=f'{name} input')
+        self.results = BoundedQueue(64, policy='drop-oldest', name=f'{name} latents')
+        self.latest = None
+        self.error = None
+
+        self._tail = None        # samples not yet fully consumed by windows
+        self._tail_times = None
+        self._next_start = 0     # offset in the tail of the next window start
+        self._pending = []       # [(windows, end_times)] waiting for a batch
+        self._pending_count = 0
+        self._pending_since = None
+
+        self.batches = 0
+        self.windows = 0
+        self.latencies = deque(maxlen=200)  # seconds per batch
+        self._busy = 0.0
+        self._stop = Event()
+        self._thread = None
+
+    # ─── lifecycle ───
+    def start(self):
+        self._stop.clear()
+        self.subscription.skip()
+        self._thread = Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.results.close()
+
+    def check_channels(self, n_channels):
+        if self.n_channels is not None and n_channels != self.n_channels:
+            raise ValueError(f'{self.name} model expects {self.n_channels} channels, '
+                             f'the stream has {n_channels}')
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.subscription.read()
+            if batch is not None:
+                eeg, aux, ts = batch
+                try:
+                    self._add(eeg if self.channels is None else eeg[self.channels], ts)
+                except ValueError as e:
+                    self.error = str(e)
+                    self.results.close()
+                    return
+            due = (self._pending_since is not None
+                   and time.perf_counter() - self._pending_since >= self.max_wait)
+            if self._pending_count >= self.batch_size or due:
+                self._flush()
+            elif batch is None:
+                time.sleep(self.poll_interval)
+        if self._pending_count:
+            self._flush()
+
+    # ─── windowing ───
+    def _add(self, samples, ts):
+        self.check_channels(samples.shape[0])
+        if self.window_samples is None:
+            self.window_samples = max(1, self.input_size // samples.shape[0])
+        if self.hop_samples is None:
+            self.hop_samples = max(1, self.window_samples // 2)
+        win, hop = self.window_samples, self.hop_samples
+
+        if self._tail is None or self._tail.shape[0] != samples.shape[0]:
+            self._tail = samples[:, :0].astype(np.float32)
+            self._tail_times = ts[:0]
+            self._next_start = 0
+        buf = np.concatenate((self._tail, samples.astype(np.float32)), axis=1)
+        times = np.concatenate((self._tail_times, ts))
+        n = buf.shape[1]
+
+        starts = np.arange(self._next_start, n - win + 1, hop)
+        if len(starts):
+            windows = sliding_window_view(buf, win, axis=1)[:, starts].transpose(1, 0, 2)
+            self._queue(np.ascontiguousarray(windows), times[starts + win - 1])
+            next_start = int(starts[-1]) + hop
+        else:
+            next_start = self._next_start
+        cut = min(next_start, n)
+        self._tail, self._tail_times = buf[:, cut:], times[cut:]
+        self._next_start = next_start - cut
+
+    def _queue(self, windows, end_times):
+        if self._pending_since is None:
+            self._pending_since = time.perf_counter()
+        self._pending.append((windows, end_times))
+        self._pending_count += len(windows)
+
+    def _flush(self):
+        windows = np.concatenate([w for w, _ in self._pending])
+        end_times = np.concatenate([t for _, t in self._pending])
+        self._pending, self._pending_count, self._pending_since = [], 0, None
+        for i in range(0, len(windows), self.batch_size):
+            self._infer(windows[i:i + self.batch_size], end_times[i:i + self.batch_size])
+
+    def _infer(self, windows, end_times):
+        t0 = time.perf_counter()
+        x = torch.from_numpy(self.preprocess(windows)).to(self.device, non_blocking=True)
+        with torch.inference_mode():
+            z_mean = self.encoder(x).float().cpu().numpy()
+        elapsed = time.perf_counter() - t0
+        instrumentation.record('process.inference', elapsed)
+        self.latencies.append(elapsed)
+        self._busy += elapsed
+        self.batches += 1
+        self.windows += len(windows)
+        self.latest = (end_times, z_mean)
+        self.results.put(self.latest)
+
+    def stats(self):
+        lat = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {'batches': self.batches, 'windows': self.windows,
+                'last_latency_ms': 1e3 * lat[-1],
+                'mean_latency_ms': 1e3 * lat.mean(),
+                'p95_latency_ms': 1e3 * np.percentile(lat, 95),
+                'windows_per_s': self.windows / self._busy if self._busy else 0.0,
+                'dropped_input': self.subscription.dropped}
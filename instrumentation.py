@@ -0,0 +1,120 @@
+import json
+import time
+import numpy as np
+
+from contextlib import contextmanager
+from threading import Lock
+from bounded_queue import pipeline_stats
+
+# ─── Stage timing histograms ────────────────────────────────────
+# Every pipeline stage records durations under a dotted name, e.g.
+#   acquire.read       source.read_chunk() call, minus the pacing sleep
+#   acquire.wait       pacing sleep until the next chunk deadline
+#   acquire.jitter     |wake-up - chunk deadline| of a BrainFlow source
+#   acquire.latency    newest sample timestamp -> chunk in hand
+#   hub.transit        publish -> read by a subscriber (oldest sample of the read)
+#   process.<what>     filtering, features, inference
+#   render.<backend>   one TimeSeriesTab frame with that plot backend
+#   end_to_end         sample timestamp -> drawn on screen
+# Histograms use fixed log-spaced millisecond buckets, so recording is O(1)
+# and snapshots from different runs can be compared bucket by bucket.
+
+BUCKETS_MS = np.concatenate(([0.0], np.logspace(-2, 4, 61)))  # 0, 10 us ... 10 s
+
+# only samples stamped with wall-clock time can be compared to time.time()
+_WALL_CLOCK_SLACK = 60.0
+
+
+class Histogram:
+    def __init__(self, name, bounds=BUCKETS_MS):
+        self.name = name
+        self.bounds = bounds
+        self.counts = np.zeros(len(bounds) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self._lock = Lock()
+
+    def record(self, ms):
+        i = int(np.searchsorted(self.bounds, ms, side='right'))
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += ms
+            self.min = min(self.min, ms)
+            self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (ms)."""
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return float(self.bounds[i]) if i < len(self.bounds) else self.max
+
+    def to_dict(self):
+        return {'count': self.count,
+                'mean_ms': self.total / self.count if self.count else 0.0,
+                'min_ms': self.min if self.count else 0.0, 'max_ms': self.max,
+                'p50_ms': self.percentile(50), 'p95_ms': self.percentile(95),
+                'p99_ms': self.percentile(99),
+                'buckets_ms': self.bounds.tolist(), 'counts': self.counts.tolist()}
+
+
+_histograms = {}
+_lock = Lock()
+
+
+def histogram(name):
+    h = _histograms.get(name)
+    if h is None:
+        with _lock:
+            h = _histograms.setdefault(name, Histogram(name))
+    return h
+
+
+def record(name, seconds):
+    histogram(name).record(1e3 * seconds)
+
+
+def record_age(name, newest_timestamp):
+    """Record now - `newest_timestamp` if the stream carries wall-clock timestamps."""
+    age = time.time() - float(newest_timestamp)
+    if -1.0 < age < _WALL_CLOCK_SLACK:
+        record(name, max(age, 0.0))
+
+
+@contextmanager
+def timed(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def snapshot():
+    """{stage: histogram dict} for every stage recorded so far."""
+    return {name: h.to_dict() for name, h in sorted(list(_histograms.items()))}
+
+
+def summary_text(stages=None):
+    """One line per stage: 'name p50/p95 ms (n)'."""
+    lines = []
+    for name, h in sorted(list(_histograms.items())):
+        if stages is None or name in stages:
+            lines.append(f"{name} {h.percentile(50):.2f}/{h.percentile(95):.2f} ms ({h.count})")
+    return lines
+
+
+def export_json(path):
+    """Write stage histograms and queue stats to `path` as JSON."""
+    with open(path, 'w') as f:
+        json.dump({'time': time.time(), 'stages': snapshot(), 'queues': pipeline_stats()},
+                  f, indent=2, default=float)
+    return path
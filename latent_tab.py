@@ -0,0 +1,97 @@
+from queue import Empty
+from ring_buffer import RingBuffer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PySide6.QtCore import QTimer
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+
+class LatentTab(QWidget):
+    """
+    Live latent means from an inference.VAEInferenceWorker: one trace per
+    latent dimension over the last `window_seconds`.
+
+    poll() drains the worker's results queue (so it never fills up and
+    drops); render() redraws. The tab owns the worker and stops it in
+    shutdown().
+    """
+
+    def __init__(self, worker, parent=None, window_seconds=10.0, refresh_ms=50, capacity=4096):
+        super().__init__(parent)
+        self.worker = worker
+        self.window_seconds = window_seconds
+        self.buffer = None
+        self.capacity = capacity
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+        self.status = QLabel("Waiting for windows…")
+        layout.addWidget(self.status)
+        self.figure = Figure()
+        self.figure.set_tight_layout(True)
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlim(-window_seconds, 0)
+        self.ax.set_xlabel("s")
+        self.ax.set_ylabel("latent mean")
+        self.lines = []
+        layout.addWidget(self.canvas)
+
+        # standalone refresh; SynapticGUI's frame scheduler stops it and calls poll()/render()
+        self.frame_interval = refresh_ms / 1000
+        self._pending_frame = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_latents)
+        self.timer.start(refresh_ms)
+
+    def poll(self):
+        """Move every finished batch from the worker into the display buffer."""
+        while True:
+            try:
+                item = self.worker.results.get_nowait()
+            except Empty:
+                break
+            if item is None:  # worker stopped
+                break
+            end_times, z_mean = item
+            if self.buffer is None or self.buffer.n_channels != z_mean.shape[1]:
+                self.buffer = RingBuffer(z_mean.shape[1], self.capacity)
+                self._make_lines(z_mean.shape[1])
+            self.buffer.append(z_mean.T, end_times)
+            self._pending_frame = True
+        return self._pending_frame
+
+    def _make_lines(self, latent_dim):
+        for line in self.lines:
+            line.remove()
+        self.lines = [self.ax.plot([], [], lw=1, label=f"z{i}")[0] for i in range(latent_dim)]
+        if latent_dim <= 16:
+            self.ax.legend(loc="upper left", fontsize="small", ncol=min(latent_dim, 8))
+
+    def render(self):
+        if self.worker.error:
+            self.status.setText(f"Stopped: {self.worker.error}")
+            return
+        if not self._pending_frame:
+            return
+        self._pending_frame = False
+        times, data = self.buffer.since(self.buffer.latest(1)[0][0] - self.window_seconds)
+        rel = times - times[-1]
+        for line, values in zip(self.lines, data):
+            line.set_data(rel, values)
+        if data.size:
+            lo, hi = float(data.min()), float(data.max())
+            pad = 0.1 * (hi - lo) or 1.0
+            self.ax.set_ylim(lo - pad, hi + pad)
+        self.canvas.draw_idle()
+        s = self.worker.stats()
+        self.status.setText(f"{s['windows']} windows, {s['mean_latency_ms']:.2f} ms/batch "
+                            f"(p95 {s['p95_latency_ms']:.2f}), {s['windows_per_s']:.0f} windows/s")
+
+    def update_latents(self):
+        self.poll()
+        self.render()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.worker.stop()
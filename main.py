@@ -1,17 +1,62 @@
 import sys
+import time
+from importlib import import_module
+from importlib.util import find_spec
 from threading import Thread
 
 from PySide6.QtGui import QAction, QFont
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QSplitter, QTabWidget,
-    QDialog, QDialogButtonBox, QComboBox, QFormLayout, QMenu
+    QDialog, QDialogButtonBox, QComboBox, QFormLayout, QMenu,
+    QSpinBox, QDoubleSpinBox, QCheckBox, QLineEdit, QPushButton,
+    QHBoxLayout, QFileDialog, QMessageBox, QLabel
 )
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QTimer, QObject
 
-from recorder import run_brainflow, stop_event
-from time_series_tab import TimeSeriesTab
-from network_tab import NetworkTab
-from body_tab import BodyTab
+from bounded_queue import pipeline_stats
+from stream_hub import stream_hub, sampling_rate
+import instrumentation
+
+# ─── Lazy registries ────────────────────────────────────────────
+# Tab types and data sources are named by (module, attribute) and imported
+# on first use, so the window comes up without loading matplotlib, scipy,
+# brainflow or h5py. Add entries with register_tab / register_source.
+
+TAB_TYPES = {
+    "Time Series": ("time_series_tab", "TimeSeriesTab"),
+    "BodyTab": ("body_tab", "BodyTab"),
+    "Network": ("network_tab", "NetworkTab"),
+}
+
+SOURCE_TYPES = {
+    "OpenBCI Cyton": ("recorder", "cyton_source"),
+    "BrainFlow Synthetic": ("sources", "SyntheticBoardSource"),
+    "Generator": ("sources", "GeneratorSource"),
+    "Replay File": ("sources", "ReplaySource"),
+}
+
+# names of plot_backends.PLOT_BACKENDS; listed here so the tab dialog does not
+# import matplotlib just to fill a combo box
+PLOT_BACKENDS = ("blit", "matplotlib", "pyqtgraph")
+
+
+def load(spec):
+    """Import and return `attribute` from a (module, attribute) spec."""
+    module, attribute = spec
+    return getattr(import_module(module), attribute)
+
+
+def register_tab(name, module, attribute):
+    TAB_TYPES[name] = (module, attribute)
+
+
+def register_source(name, module, attribute):
+    SOURCE_TYPES[name] = (module, attribute)
+
+
+def available_backends():
+    """Names of the plot backends that can be created in this environment."""
+    return [name for name in PLOT_BACKENDS if name != "pyqtgraph" or find_spec("pyqtgraph")]
 
 
 class TabTypeDialog(QDialog):
@@ -20,16 +65,189 @@ class TabTypeDialog(QDialog):
         self.setWindowTitle("Choose Tab Type")
         layout = QFormLayout(self)
         self.combo = QComboBox()
-        self.combo.addItems(["Time Series", "BodyTab", "Network"])
+        self.combo.addItems(list(TAB_TYPES))
         layout.addRow("Tab Type:", self.combo)
+        # rendering backend, only used by Time Series tabs
+        self.backend_combo = QComboBox()
+        layout.addRow("Renderer:", self.backend_combo)
+        self.combo.currentTextChanged.connect(self._kind_changed)
+        self._kind_changed(self.combo.currentText())
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(self.accept)
         buttons.rejected.connect(self.reject)
         layout.addRow(buttons)
 
+    def _kind_changed(self, kind):
+        time_series = kind == "Time Series"
+        if time_series and not self.backend_combo.count():
+            self.backend_combo.addItems(available_backends())
+        self.backend_combo.setEnabled(time_series)
+
     def get_tab_type(self):
         return self.combo.currentText()
 
+    def get_backend(self):
+        return self.backend_combo.currentText()
+
+
+class SourceDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Choose Data Source")
+        layout = QFormLayout(self)
+        self.combo = QComboBox()
+        self.combo.addItems(list(SOURCE_TYPES))
+        layout.addRow("Source:", self.combo)
+
+        # generator settings
+        self.channels = QSpinBox()
+        self.channels.setRange(1, 1024)
+        self.channels.setValue(8)
+        layout.addRow("Channels:", self.channels)
+        self.rate = QSpinBox()
+        self.rate.setRange(1, 100000)
+        self.rate.setValue(250)
+        self.rate.setSuffix(" Hz")
+        layout.addRow("Sampling rate:", self.rate)
+
+        # replay settings
+        self.path = QLineEdit()
+        browse = QPushButton("Browse…")
+        browse.clicked.connect(self._browse)
+        path_row = QHBoxLayout()
+        path_row.addWidget(self.path)
+        path_row.addWidget(browse)
+        layout.addRow("File:", path_row)
+
+        # generator + replay
+        self.speed = QDoubleSpinBox()
+        self.speed.setRange(0, 1000)
+        self.speed.setValue(1.0)
+        self.speed.setToolTip("1 = real time, N = N x faster, 0 = as fast as possible")
+        layout.addRow("Speed:", self.speed)
+
+        self.record = QCheckBox("Record to disk")
+        self.record.setChecked(True)
+        layout.addRow(self.record)
+
+        self.separate_process = QCheckBox("Run acquisition in a separate process")
+        self.separate_process.setToolTip(
+            "Acquisition and recording keep running at full rate even when the GUI stalls")
+        layout.addRow(self.separate_process)
+
+        # DSP preset applied in the acquisition process, before the stream reaches any tab;
+        # recordings stay raw
+        self.process_filters = QComboBox()
+        self.process_filters.addItems(list(load(("dsp", "PRESETS"))))
+        self.process_filters.setEnabled(False)
+        self.separate_process.toggled.connect(self.process_filters.setEnabled)
+        layout.addRow("Process filters:", self.process_filters)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+        self.combo.currentTextChanged.connect(self._update_enabled)
+        self._update_enabled(self.combo.currentText())
+
+    def _browse(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Recording", "", "Recordings (*.h5 *.hdf5 *.bin *.npy *.csv)")
+        if path:
+            self.path.setText(path)
+
+    def _update_enabled(self, kind):
+        self.channels.setEnabled(kind == "Generator")
+        self.rate.setEnabled(kind == "Generator")
+        self.path.setEnabled(kind == "Replay File")
+        self.speed.setEnabled(kind in ("Generator", "Replay File"))
+
+    def source_spec(self):
+        """(factory, kwargs) for the chosen source; picklable, so a child process can build it."""
+        kind = self.combo.currentText()
+        factory = load(SOURCE_TYPES[kind])
+        if kind == "Generator":
+            return factory, dict(n_eeg=self.channels.value(), sampling_rate=self.rate.value(),
+                                 speed=self.speed.value())
+        if kind == "Replay File":
+            return factory, dict(path=self.path.text(), speed=self.speed.value())
+        return factory, {}
+
+    def filters(self):
+        """DSP preset for the acquisition process, or None for raw."""
+        name = self.process_filters.currentText()
+        return None if name == "Raw" else name
+
+    def make_source(self):
+        factory, kwargs = self.source_spec()
+        return factory(**kwargs)
+
+
+def _timing_text(timing):
+    # acquisition jitter/latency reported by a source in another process
+    if not timing or not timing.get('chunks'):
+        return ""
+    return (f", jitter p95 {timing['jitter_ms_p95']:.1f} ms, "
+            f"latency p95 {timing['latency_ms_p95']:.1f} ms, late {timing['late']}")
+
+
+class FrameScheduler(QObject):
+    """
+    One timer for every tab. Each tick, every registered tab poll()s its
+    subscription, so ingestion and recording never stall. Only tabs that are
+    on screen (current page of their QTabWidget, window not minimized) also
+    render(), no more often than their own `frame_interval` and the global
+    `max_fps` cap. Each tab has a render deadline that advances by whole
+    frame intervals, so tick jitter neither skips frames nor lets early
+    ticks add up to extra ones.
+    """
+
+    def __init__(self, window, max_fps=30):
+        super().__init__(window)
+        self.window = window
+        self.tabs = []
+        self._next_due = {}  # id(tab) -> monotonic time of its next frame
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.set_max_fps(max_fps)
+        self.timer.start()
+
+    def set_max_fps(self, fps):
+        self.max_fps = fps
+        self.timer.setInterval(max(1, round(1000 / fps)))
+
+    def add(self, tab):
+        # tabs without poll/render (e.g. NetworkTab) have nothing to schedule
+        if not (hasattr(tab, 'poll') and hasattr(tab, 'render')):
+            return
+        tab.timer.stop()
+        self.tabs.append(tab)
+
+    def remove(self, tab):
+        if tab in self.tabs:
+            self.tabs.remove(tab)
+            self._next_due.pop(id(tab), None)
+        if hasattr(tab, 'shutdown'):
+            tab.shutdown()
+
+    def tick(self):
+        now = time.monotonic()
+        on_screen = not self.window.isMinimized()
+        # a tick that lands a little before a deadline still renders that frame;
+        # the deadline itself only moves by whole intervals, so early ticks do not add up
+        early = 0.5 * self.timer.interval() / 1000
+        for tab in list(self.tabs):
+            tab.poll()
+            if not (on_screen and tab.isVisible()):
+                continue
+            due = self._next_due.get(id(tab), now)
+            if now < due - early:
+                continue
+            # after a stall, start again from now rather than catching up in a burst
+            self._next_due[id(tab)] = max(due + tab.frame_interval, now)
+            tab.render()
+
 
 class SynapticGUI(QMainWindow):
     def __init__(self):
@@ -46,6 +264,8 @@ class SynapticGUI(QMainWindow):
         # track our horizontal “rows”
         self.rows = []
         self._create_new_row()
+        self.scheduler = FrameScheduler(self)
+        self._setup_status_bar()
         self._setup_menu()
 
     def _setup_menu(self):
@@ -57,10 +277,65 @@ class SynapticGUI(QMainWindow):
         open_act.triggered.connect(self.open_new_tab)
         file_menu.addAction(open_act)
 
+        model_act = QAction("Load VAE Model…", self)
+        model_act.triggered.connect(self.load_model)
+        file_menu.addAction(model_act)
+
+        export_act = QAction("Export Timings…", self)
+        export_act.triggered.connect(self.export_timings)
+        file_menu.addAction(export_act)
+
+        view_menu = menubar.addMenu("View")
+        self.timings_act = QAction("Show Timings", self, checkable=True)
+        self.timings_act.toggled.connect(self.timings_label.setVisible)
+        view_menu.addAction(self.timings_act)
+        fps_menu = view_menu.addMenu("Max Frame Rate")
+        for fps in (10, 30, 60):
+            act = QAction(f"{fps} fps", self, checkable=True)
+            act.setChecked(fps == self.scheduler.max_fps)
+            act.triggered.connect(lambda checked, fps=fps: self._set_max_fps(fps))
+            fps_menu.addAction(act)
+        self.fps_actions = fps_menu.actions()
+
         connect_act = QAction("Connect", self)
         connect_act.triggered.connect(self.connect_action_triggered)
         menubar.addAction(connect_act)
 
+    def _set_max_fps(self, fps):
+        self.scheduler.set_max_fps(fps)
+        for act in self.fps_actions:
+            act.setChecked(act.text() == f"{fps} fps")
+
+    def _setup_status_bar(self):
+        # per-consumer queue depth / drop counters, refreshed once a second
+        self.pipeline_label = QLabel()
+        self.statusBar().addPermanentWidget(self.pipeline_label, 1)
+        # stage timing overlay (View > Show Timings): p50/p95 per stage
+        self.timings_label = QLabel()
+        self.timings_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.timings_label)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_pipeline_stats)
+        self.stats_timer.start(1000)
+
+    def update_pipeline_stats(self):
+        stats = pipeline_stats()
+        parts = [f"{name}: {s['depth']}/{s['capacity']} (max {s['max_depth']}), "
+                 f"dropped {s['dropped']}/{s['enqueued']}" + _timing_text(s.get('timing'))
+                 for name, s in sorted(stats.items())]
+        self.pipeline_label.setText("   |   ".join(parts))
+        dropping = any(s['dropped'] for s in stats.values())
+        self.pipeline_label.setStyleSheet("color: red;" if dropping else "")
+        if self.timings_label.isVisible():
+            lines = instrumentation.summary_text()
+            self.timings_label.setText("   |   ".join(lines) or "no timings yet")
+            self.timings_label.setToolTip("p50/p95 ms (count)\n" + "\n".join(lines))
+
+    def export_timings(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timings", "timings.json", "JSON (*.json)")
+        if path:
+            instrumentation.export_json(path)
+
     def _create_new_row(self):
         row = QSplitter(Qt.Horizontal)
         row.setOpaqueResize(False)
@@ -104,14 +379,19 @@ class SynapticGUI(QMainWindow):
             return
 
         kind = dlg.get_tab_type()
-        content = {
-            "Time Series": TimeSeriesTab,
-            "BodyTab": BodyTab,
-            "Network": NetworkTab
-        }[kind]()
+        tab_cls = load(TAB_TYPES[kind])
+        if kind == "Time Series":
+            # build filters and buffers for the running stream's rate, not the 250 Hz default
+            content = tab_cls(backend=dlg.get_backend(),
+                              sampling_rate=stream_hub.sampling_rate or sampling_rate)
+        else:
+            content = tab_cls()
         if kind == "BodyTab":
             content.highlight_part("head", 0.5)
+        self._add_tab(content, kind)
 
+    def _add_tab(self, content, kind):
+        """Place `content` in a new tab widget on the last row and schedule its refresh."""
         self.tab_count += 1
         title = f"{kind} {self.tab_count}"
         row = self._get_last_row()
@@ -119,6 +399,30 @@ class SynapticGUI(QMainWindow):
         tw.addTab(content, title)
         row.addWidget(tw)
         self._renormalize_splitters()
+        self.scheduler.add(content)
+
+    def load_model(self):
+        """Encode the live stream with a trained VAE and plot its latent means in a new tab."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load VAE Model", "", "PyTorch checkpoints (*.pt *.pth)")
+        if not path:
+            return
+        try:
+            import torch
+            from inference import load_vae, window_preprocess, VAEInferenceWorker
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            vae, normalization = load_vae(path, device=device)
+            # feed live windows scaled and channel-selected like the training data
+            worker = VAEInferenceWorker(
+                vae, stream_hub, device=device,
+                channels=(normalization or {}).get('channels'),
+                preprocess=window_preprocess(normalization, vae.input_size))
+        except Exception as e:
+            QMessageBox.warning(self, "Load VAE Model", f"Could not load model:\n{e}")
+            return
+        worker.start()
+        # the tab drains worker.results every scheduler tick and stops the worker when closed
+        self._add_tab(load(("latent_tab", "LatentTab"))(worker), "Latent Space")
 
     def _show_tab_menu(self, pos: QPoint):
         bar = self.sender()
@@ -135,6 +439,8 @@ class SynapticGUI(QMainWindow):
     def undock_tab(self, idx, tw: QTabWidget):
         w = tw.widget(idx)
         tw.removeTab(idx)
+        # stop its refresh before it goes; deleteLater alone leaves timers running
+        self.scheduler.remove(w)
         w.setParent(None)
         w.deleteLater()
 
@@ -154,19 +460,33 @@ class SynapticGUI(QMainWindow):
                 self.rows.pop(i)
 
     def connect_action_triggered(self):
-        # 1) (optional) open a Time-Series tab automatically
-        ts_tab = TimeSeriesTab()
-        self.tab_count += 1
-        name = f"Time Series {self.tab_count}"
-        row = self._get_last_row()
-        tw = self._make_tab_widget()
-        tw.addTab(ts_tab, name)
-        row.addWidget(tw)
-        self._renormalize_splitters()
+        # 0) pick where the data comes from
+        dlg = SourceDialog(self)
+        if dlg.exec() != QDialog.Accepted:
+            return
+        from recorder import run_source, stop_event
+        from acquisition_process import AcquisitionProcess
 
-        # 2) clear any previous stop flag & start acquisition
         stop_event.clear()
-        Thread(target=run_brainflow, daemon=True).start()
+        try:
+            if dlg.separate_process.isChecked():
+                # the child opens the source; samples arrive through shared memory
+                factory, kwargs = dlg.source_spec()
+                source = self.acquisition = AcquisitionProcess(
+                    factory, kwargs, record=dlg.record.isChecked(), filters=dlg.filters()).start()
+            else:
+                source = dlg.make_source()
+        except Exception as e:
+            QMessageBox.warning(self, "Connect", f"Could not open source:\n{e}")
+            return
+
+        # 1) (optional) open a Time-Series tab automatically
+        ts_tab = load(TAB_TYPES["Time Series"])(sampling_rate=source.sampling_rate)
+        self._add_tab(ts_tab, "Time Series")
+
+        # 2) start acquisition (already running if it lives in its own process)
+        if not isinstance(source, AcquisitionProcess):
+            Thread(target=run_source, args=(source, dlg.record.isChecked()), daemon=True).start()
 
 
 def main():
@@ -0,0 +1,132 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+pg = None  # optional renderer; pyqtgraph is imported by the first PyQtGraphPlot
+
+Y_RANGE = (0, 40)           # raw samples
+FILTERED_Y_RANGE = (-20, 20)  # band-passed / re-referenced samples are zero-centred
+
+
+# ─── Plot backends ──────────────────────────────────────────────
+# Each backend is a QWidget that draws one channel trace and exposes
+#   set_window(seconds)      – visible time span
+#   set_y_range(lo, hi)      – fixed vertical range
+#   set_data(times, samples) – replace the trace with the given arrays
+
+
+class MatplotlibPlot(FigureCanvas):
+    """Original renderer: clears and redraws the whole figure every frame."""
+
+    def __init__(self, window_seconds, parent=None):
+        self.figure = Figure()
+        self.figure.set_tight_layout(True)
+        super().__init__(self.figure)
+        self.setParent(parent)
+        self.window_seconds = window_seconds
+        self.y_range = Y_RANGE
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_ylim(*Y_RANGE)
+        self.ax.set_xlim(0, window_seconds)
+
+    def set_window(self, seconds):
+        self.window_seconds = seconds
+
+    def set_y_range(self, lo, hi):
+        self.y_range = (lo, hi)
+
+    def set_data(self, times, samples):
+        self.ax.clear()
+        self.ax.plot(times, samples, color="blue")
+        self.ax.set_ylim(*self.y_range)
+        if len(times):
+            last = times[-1]
+            self.ax.set_xlim(last - self.window_seconds, last)
+        self.draw()
+
+
+class BlitPlot(FigureCanvas):
+    """
+    Matplotlib renderer that keeps one Line2D alive and blits it over a cached
+    background. Time is plotted relative to the newest sample so the axes never
+    change and the background only has to be re-rendered on resize.
+    """
+
+    def __init__(self, window_seconds, parent=None):
+        self.figure = Figure()
+        self.figure.set_tight_layout(True)
+        super().__init__(self.figure)
+        self.setParent(parent)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_ylim(*Y_RANGE)
+        self.ax.set_xlim(-window_seconds, 0)
+        (self.line,) = self.ax.plot([], [], color="blue", animated=True)
+        self.background = None
+        self.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # full redraws (first show, resize, axis change) refresh the cache
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        self.ax.draw_artist(self.line)
+
+    def set_window(self, seconds):
+        self.ax.set_xlim(-seconds, 0)
+        self.background = None
+
+    def set_y_range(self, lo, hi):
+        self.ax.set_ylim(lo, hi)
+        self.background = None
+
+    def set_data(self, times, samples):
+        if len(times):
+            self.line.set_data(times - times[-1], samples)
+        else:
+            self.line.set_data([], [])
+        if self.background is None:
+            self.draw()
+            return
+        self.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.blit(self.ax.bbox)
+
+
+class PyQtGraphPlot(QWidget):
+    """pyqtgraph renderer (QPainter, no OpenGL); needs `pip install pyqtgraph`."""
+
+    def __init__(self, window_seconds, parent=None):
+        global pg
+        if pg is None:
+            try:
+                import pyqtgraph as pg
+            except ImportError:
+                raise ImportError("The 'pyqtgraph' backend requires pyqtgraph to be installed.")
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.plot = pg.PlotWidget(background="w")
+        self.plot.setMouseEnabled(x=False, y=False)
+        self.plot.disableAutoRange()
+        self.plot.setYRange(*Y_RANGE, padding=0)
+        self.plot.setXRange(-window_seconds, 0, padding=0)
+        self.curve = self.plot.plot(pen="b")
+        self.curve.setClipToView(True)
+        layout.addWidget(self.plot)
+
+    def set_window(self, seconds):
+        self.plot.setXRange(-seconds, 0, padding=0)
+
+    def set_y_range(self, lo, hi):
+        self.plot.setYRange(lo, hi, padding=0)
+
+    def set_data(self, times, samples):
+        if len(times):
+            self.curve.setData(times - times[-1], samples, skipFiniteCheck=True)
+        else:
+            self.curve.setData([], [])
+
+
+PLOT_BACKENDS = {
+    "blit": BlitPlot,
+    "matplotlib": MatplotlibPlot,
+    "pyqtgraph": PyQtGraphPlot,
+}
@@ -0,0 +1,98 @@
+import os, glob, sys, time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from serial import Serial as PySerial
+from serial.tools import list_ports
+
+BAUD_RATE = 115200
+
+# USB (VID, PID) of the OpenBCI dongle's FTDI FT231X
+OPENBCI_USB_IDS = {(0x0403, 0x6015)}
+
+# last port that answered, so reconnects skip the scan
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.synaptic_gui_port')
+
+
+def _fallback_ports():
+    # serial devices list_ports may not describe (no USB metadata)
+    if sys.platform.startswith(('linux', 'cygwin')):
+        return sorted(glob.glob('/dev/ttyUSB*'))
+    if sys.platform.startswith('darwin'):
+        return sorted(glob.glob('/dev/cu.usbserial*'))
+    return []
+
+
+def candidate_ports(usb_ids=OPENBCI_USB_IDS):
+    """Ports worth probing: USB VID/PID matches first, then other USB serial ports."""
+    matches, others = [], []
+    for info in list_ports.comports():
+        if info.vid is None:
+            continue
+        (matches if (info.vid, info.pid) in usb_ids else others).append(info.device)
+    ports = matches + others + _fallback_ports()
+    return list(dict.fromkeys(ports))
+
+
+def probe_port(port, timeout=0.5, baudrate=BAUD_RATE):
+    """True if the device on `port` answers 'v' like an OpenBCI board, within `timeout` s."""
+    try:
+        with PySerial(port=port, baudrate=baudrate, timeout=0.02, write_timeout=timeout) as s:
+            s.reset_input_buffer()
+            s.write(b'v')
+            resp = b''
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                resp += s.read(s.in_waiting or 1)
+                # boards end every reply with '$$$'; stop as soon as it arrives
+                if b'OpenBCI' in resp or b'$$$' in resp:
+                    break
+            return b'OpenBCI' in resp
+    except (OSError, ValueError):
+        return False
+
+
+def _read_cache():
+    try:
+        with open(CACHE_FILE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_cache(port):
+    try:
+        with open(CACHE_FILE, 'w') as f:
+            f.write(port)
+    except OSError:
+        pass
+
+
+def find_openbci_port(ports=None, timeout=0.5, use_cache=True, max_workers=8):
+    """
+    Finds the port to which the Cyton Dongle is connected.
+
+    The cached port from the last success is tried first. Otherwise all
+    candidates (default: candidate_ports(), cached port included) are probed
+    in parallel and the first one that answers wins; the rest are abandoned.
+    """
+    cached = _read_cache() if use_cache else None
+    if cached and (ports is None or cached in ports) and probe_port(cached, timeout):
+        return cached
+
+    # the cached port stays in the scan: the board may come back on it after a replug
+    ports = candidate_ports() if ports is None else list(ports)
+    if ports:
+        pool = ThreadPoolExecutor(max_workers=min(max_workers, len(ports)),
+                                  thread_name_prefix='port-probe')
+        try:
+            futures = {pool.submit(probe_port, port, timeout): port for port in ports}
+            for future in as_completed(futures):
+                if future.result():
+                    port = futures[future]
+                    if use_cache:
+                        _write_cache(port)
+                    return port
+        finally:
+            # don't wait for slower probes once we have an answer
+            pool.shutdown(wait=False, cancel_futures=True)
+    raise OSError('Cannot find OpenBCI port.')
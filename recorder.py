@@ -1,119 +1,53 @@
-import glob, sys, time, serial, os
-import pandas as pd
-import numpy as np
+import os
 
-from serial import Serial as PySerial
-from threading import Thread, Event
-from queue import Queue
 # from psychopy.hardware import keyboard  # if you’re using PsychoPy for escape
 
-from brainflow.board_shim import BoardShim, BrainFlowInputParams
-
-# ─── Shared queue for GUI ───────────────────────────────────────
-data_queue = Queue()
+from sources import BrainFlowSource, pump, find_openbci_port, BAUD_RATE
+from stream_writer import ChunkWriter, ChunkFileSink
+from session import HDF5SessionSink
+from stream_hub import stream_hub, stop_event, sampling_rate  # re-exported: shared GUI stream
 
 lsl_out       = False
 save_dir      = 'data'
 run           = 111
-save_file_aux = os.path.join(save_dir, f'aux_run-{run}.npy')
-save_file_eeg = os.path.join(save_dir, f'eeg_run-{run}.npy')
-sampling_rate = 250
+save_format   = 'h5'   # 'h5' (compressed HDF5 session) or 'bin' (raw chunk file)
+save_file     = os.path.join(save_dir, f'run-{run}.{save_format}')
 CYTON_BOARD_ID = 0
-BAUD_RATE     = 115200
 ANALOGUE_MODE = '/2'
-
-# Used to signal stop from GUI
-stop_event = Event()
-
-
-def find_openbci_port():
-    """Finds the port to which the Cyton Dongle is connected."""
-    if sys.platform.startswith('win'):
-        ports = [f'COM{i+1}' for i in range(256)]
-    elif sys.platform.startswith(('linux', 'cygwin')):
-        ports = glob.glob('/dev/ttyUSB*')
-    elif sys.platform.startswith('darwin'):
-        ports = glob.glob('/dev/cu.usbserial*')
-    else:
-        raise EnvironmentError('Unsupported OS for serial scan')
-    openbci_port = ''
-    for port in ports:
-        try:
-            s = PySerial(port=port, baudrate=BAUD_RATE, timeout=1)
-            s.write(b'v')
-            time.sleep(1)
-            resp = s.read_all().decode(errors='ignore')
-            s.close()
-            if 'OpenBCI' in resp:
-                openbci_port = port
-                break
-        except Exception:
-            continue
-    if not openbci_port:
-        raise OSError('Cannot find OpenBCI port.')
-    return openbci_port
+CHUNK_MS      = 20     # acquisition latency: one chunk is read every CHUNK_MS
+
+
+def cyton_source():
+    """The configured OpenBCI board as a DataSource."""
+    ip_port = 9000 if CYTON_BOARD_ID == 6 else None
+    return BrainFlowSource(CYTON_BOARD_ID, ip_port=ip_port,
+                           commands=('/0', '//'), analogue_mode=ANALOGUE_MODE, chunk_ms=CHUNK_MS)
+
+
+def run_source(source, record=True, hub=None, stop=None):
+    """Acquire from `source` until `stop` (stop_event) is set, publishing into `hub` (stream_hub)."""
+    hub = stream_hub if hub is None else hub
+    stop = stop_event if stop is None else stop
+    writer = None
+    if record:
+        # stream to disk in ~1 s chunks; convert offline with session.export_csv
+        os.makedirs(save_dir, exist_ok=True)
+        sink_cls = HDF5SessionSink if save_format == 'h5' else ChunkFileSink
+        sink = sink_cls(save_file, source.n_eeg, source.n_aux, source.sampling_rate,
+                        meta=source.meta)
+        writer = ChunkWriter(sink, chunk_samples=source.sampling_rate)
+    hub.configure(source.n_eeg, source.n_aux, source.sampling_rate)
+    try:
+        pump(source, hub, stop, writer)
+    finally:
+        if writer is not None:
+            writer.close()
 
 
 def run_brainflow():
-    """Acquire data until stop_event is set, pushing into data_queue."""
-    os.makedirs(save_dir, exist_ok=True)
-
-    print(BoardShim.get_board_descr(CYTON_BOARD_ID))
-    params = BrainFlowInputParams()
-    if CYTON_BOARD_ID != 6:
-        params.serial_port = find_openbci_port()
-    else:
-        params.ip_port = 9000
-
-    board = BoardShim(CYTON_BOARD_ID, params)
-    board.prepare_session()
-    board.config_board('/0')
-    board.config_board('//')
-    board.config_board(ANALOGUE_MODE)
-    board.start_stream(45000)
-
-    def _acquire(q: Queue):
-        while not stop_event.is_set():
-            data = board.get_board_data()
-            ts  = data[board.get_timestamp_channel(CYTON_BOARD_ID)]
-            eeg = data[board.get_eeg_channels(CYTON_BOARD_ID)]
-            aux = data[board.get_analog_channels(CYTON_BOARD_ID)]
-            if ts.size:
-                # push into the shared queue for GUI
-                data_queue.put((eeg, aux, ts))
-            time.sleep(0.1)
-
-    Thread(target=_acquire, args=(data_queue,), daemon=True).start()
-
-    # accumulate into arrays until stop
-    eeg_data = np.zeros((len(board.get_eeg_channels(CYTON_BOARD_ID)), 0))
-    aux_data = np.zeros((len(board.get_analog_channels(CYTON_BOARD_ID)), 0))
-    # kb = keyboard.Keyboard()  # if you want PsychoPy ESC handling
-
-    while not stop_event.is_set():
-        time.sleep(0.1)
-        # optional: check for ESC if using keyboard
-        # if 'escape' in kb.getKeys():
-        #     stop_event.set()
-        #     break
-
-    # teardown
-    board.stop_stream()
-    board.release_session()
-
-    # save raw numpy
-    np.save(save_file_aux, aux_data)
-    np.save(save_file_eeg, eeg_data)
-
-    # save CSV
-    df_aux = pd.DataFrame(aux_data.T,
-                          columns=[f'Aux_{i}' for i in range(aux_data.shape[0])])
-    df_aux.to_csv(os.path.join(save_dir, f'aux_run-{run}.csv'), index=False)
-
-    df_eeg = pd.DataFrame(eeg_data.T,
-                          columns=[f'EEG_{i}' for i in range(eeg_data.shape[0])])
-    df_eeg.to_csv(os.path.join(save_dir, f'eeg_run-{run}.csv'), index=False)
+    """Acquire data until stop_event is set, publishing into stream_hub."""
+    run_source(cyton_source())
 
 
 if __name__ == "__main__":
-    run_brainflow()
\ No newline at end of file
+    run_brainflow()
@@ -0,0 +1,167 @@
+import json
+import numpy as np
+
+# Body regions in silhouette coordinates (the image scaled into 1000 x 2000).
+# coordinate_picker.py writes REGION_FILE; BodyTab reads it and falls back to
+# DEFAULT_REGIONS when it does not exist.
+#
+#   {"size": [1000, 2000],
+#    "regions": [{"name": "head", "ellipse": [x, y, w, h], "channels": [0]},
+#                {"name": "left_arm", "polygon": [[x, y], ...], "channels": [1]}],
+#    "electrodes": {"0": [x, y], ...}}
+#
+# "channels" and "electrodes" are both optional; electrodes are assigned to the
+# region they fall in and override "channels" of that region.
+
+REGION_FILE = 'body_regions.json'
+SCENE_SIZE = (1000, 2000)
+
+
+class Region:
+    def __init__(self, name, polygon=None, ellipse=None, channels=()):
+        if (polygon is None) == (ellipse is None):
+            raise ValueError(f"Region '{name}' needs exactly one of polygon or ellipse")
+        self.name = name
+        self.polygon = None if polygon is None else np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        self.ellipse = None if ellipse is None else tuple(float(v) for v in ellipse)
+        self.channels = [int(c) for c in channels]
+        if self.polygon is not None:
+            if len(self.polygon) < 3:
+                raise ValueError(f"Region '{name}' needs at least 3 points")
+            lo, hi = self.polygon.min(axis=0), self.polygon.max(axis=0)
+            self.bbox = (lo[0], lo[1], hi[0], hi[1])
+        else:
+            x, y, w, h = self.ellipse
+            self.bbox = (x, y, x + w, y + h)
+
+    def contains(self, x, y):
+        """Point-in-region test; `x`, `y` may be scalars or arrays."""
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        x0, y0, x1, y1 = self.bbox
+        if self.ellipse is not None:
+            cx, cy, rx, ry = (x0 + x1) / 2, (y0 + y1) / 2, (x1 - x0) / 2, (y1 - y0) / 2
+            return ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1.0
+        # even-odd ray casting against every edge at once
+        px, py = self.polygon[:, 0], self.polygon[:, 1]
+        qx, qy = np.roll(px, -1), np.roll(py, -1)
+        x, y = x[..., None], y[..., None]
+        crosses = (py > y) != (qy > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at = px + (y - py) * (qx - px) / (qy - py)
+        return np.count_nonzero(crosses & (x < at), axis=-1) % 2 == 1
+
+    def to_dict(self):
+        d = {'name': self.name}
+        if self.polygon is not None:
+            d['polygon'] = [[round(float(x), 1), round(float(y), 1)] for x, y in self.polygon]
+        else:
+            d['ellipse'] = list(self.ellipse)
+        if self.channels:
+            d['channels'] = self.channels
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['name'], d.get('polygon'), d.get('ellipse'), d.get('channels', ()))
+
+
+DEFAULT_REGIONS = [
+    Region('head', ellipse=(435, 0, 130, 130), channels=[0]),
+    Region('left_arm', [(390, 200), (430, 200), (380, 400), (340, 400)], channels=[1]),
+    Region('right_arm', [(570, 200), (610, 200), (660, 400), (620, 400)], channels=[2]),
+    Region('torso', [(430, 150), (570, 150), (570, 600), (430, 600)], channels=[3]),
+    Region('left_leg', [(430, 600), (500, 600), (500, 900), (430, 900)], channels=[4]),
+    Region('right_leg', [(500, 600), (570, 600), (570, 900), (500, 900)], channels=[5]),
+]
+
+
+def load_regions(path=REGION_FILE):
+    """(regions, electrodes) from a region file; electrodes is {channel: (x, y)}."""
+    with open(path) as f:
+        d = json.load(f)
+    regions = [Region.from_dict(r) for r in d.get('regions', [])]
+    electrodes = {int(c): tuple(p) for c, p in d.get('electrodes', {}).items()}
+    return regions, electrodes
+
+
+def save_regions(path, regions, electrodes=None, size=SCENE_SIZE):
+    d = {'size': list(size), 'regions': [r.to_dict() for r in regions]}
+    if electrodes:
+        d['electrodes'] = {str(c): [round(float(x), 1), round(float(y), 1)]
+                           for c, (x, y) in sorted(electrodes.items())}
+    with open(path, 'w') as f:
+        json.dump(d, f, indent=1)
+    return path
+
+
+class RegionIndex:
+    """
+    Uniform grid over region bounding boxes.
+
+    A point only tests the few regions whose box overlaps its cell, so hover,
+    click and electrode lookups cost the same with six regions or hundreds.
+    Regions added later are on top, as in the scene.
+    """
+
+    def __init__(self, regions=(), cell=50.0):
+        self.cell = float(cell)
+        self.regions = []
+        self._grid = {}  # (col, row) -> region indices, in insertion order
+        for region in regions:
+            self.add(region)
+
+    def _cells(self, bbox):
+        x0, y0, x1, y1 = (int(np.floor(v / self.cell)) for v in bbox)
+        return ((c, r) for c in range(x0, x1 + 1) for r in range(y0, y1 + 1))
+
+    def add(self, region):
+        i = len(self.regions)
+        self.regions.append(region)
+        for key in self._cells(region.bbox):
+            self._grid.setdefault(key, []).append(i)
+        return i
+
+    def index_at(self, x, y):
+        """Index of the topmost region containing (x, y), or -1."""
+        key = (int(np.floor(x / self.cell)), int(np.floor(y / self.cell)))
+        for i in reversed(self._grid.get(key, ())):
+            x0, y0, x1, y1 = self.regions[i].bbox
+            if x0 <= x <= x1 and y0 <= y <= y1 and self.regions[i].contains(x, y):
+                return i
+        return -1
+
+    def at(self, x, y):
+        """Name of the topmost region containing (x, y), or None."""
+        i = self.index_at(x, y)
+        return self.regions[i].name if i >= 0 else None
+
+    def locate(self, points):
+        """Region index (or -1) for each (x, y) in `points`."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cols = np.floor(points / self.cell).astype(np.int64)
+        found = np.full(len(points), -1, dtype=np.int64)
+        # group points by cell, then test each cell's candidates on all its points at once
+        keys, inverse = np.unique(cols, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        groups = np.split(order, np.cumsum(np.bincount(inverse.ravel(), minlength=len(keys)))[:-1])
+        for key, members in zip(map(tuple, keys.tolist()), groups):
+            for i in self._grid.get(key, ()):
+                hit = self.regions[i].contains(points[members, 0], points[members, 1])
+                found[members[hit]] = i  # later regions win
+        return found
+
+    def body_map(self, electrodes=None):
+        """
+        {region: channels} for BodyMap. Regions keep their own "channels" unless
+        an electrode position falls inside them.
+        """
+        mapping = {r.name: list(r.channels) for r in self.regions}
+        if electrodes:
+            channels = sorted(electrodes)
+            owners = self.locate([electrodes[c] for c in channels])
+            placed = {}
+            for channel, i in zip(channels, owners):
+                if i >= 0:
+                    placed.setdefault(self.regions[i].name, []).append(channel)
+            mapping.update(placed)
+        return {name: channels for name, channels in mapping.items() if channels}
@@ -0,0 +1,17 @@
+from sources import ReplaySource, pump
+
+
+def replay(path, q, stop_event, speed=1.0, chunk_ms=40, loop=False, sampling_rate=250):
+    """
+    Push a recorded session into `q` as (eeg, aux, ts) chunks until it ends
+    or `stop_event` is set.
+
+    speed=1 plays in real time, speed=N plays N times faster and speed=0 (or
+    None) pushes as fast as possible. Chunks hold `chunk_ms` of recorded time,
+    so at speed=1 the queue sees the same chunk sizes a live board would
+    produce. Pacing is deadline based: a slow consumer never makes the replay
+    drift, it only makes individual puts late. When looping, timestamps keep
+    increasing across passes. Returns the number of samples pushed.
+    """
+    source = ReplaySource(path, speed, chunk_ms, loop, sampling_rate)
+    return pump(source, q, stop_event)
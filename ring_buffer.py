@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated multi-channel sample buffer with a single write index.
+
+    Every sample is stored twice (at i and i + capacity) so the most recent
+    `n <= capacity` samples are always one contiguous slice, and `latest()`
+    can hand out views instead of copies.
+    """
+
+    def __init__(self, n_channels, capacity, dtype=np.float64):
+        self.n_channels = n_channels
+        self.capacity = capacity
+        self.data = np.zeros((n_channels, 2 * capacity), dtype=dtype)
+        self.times = np.zeros(2 * capacity)
+        self.write_index = 0  # total number of samples ever written
+
+    def __len__(self):
+        return min(self.write_index, self.capacity)
+
+    def _write(self, dst, src):
+        cap = self.capacity
+        n = src.shape[-1]
+        start = self.write_index % cap
+        first = min(n, cap - start)
+        dst[..., start:start + first] = src[..., :first]
+        dst[..., start + cap:start + cap + first] = src[..., :first]
+        rest = n - first
+        if rest:
+            dst[..., :rest] = src[..., first:]
+            dst[..., cap:cap + rest] = src[..., first:]
+
+    def append(self, samples, times):
+        """Append a (n_channels, n) block of samples with their (n,) timestamps."""
+        samples = np.asarray(samples)
+        times = np.asarray(times)
+        n = samples.shape[1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            # only the tail can survive; skip writing what would be overwritten
+            self.write_index += n - self.capacity
+            samples = samples[:, -self.capacity:]
+            times = times[-self.capacity:]
+            n = self.capacity
+        self._write(self.data, samples)
+        self._write(self.times, times)
+        self.write_index += n
+
+    def latest(self, n=None):
+        """Return (times, data) views of the last `n` samples (default: all held)."""
+        held = len(self)
+        n = held if n is None else min(n, held)
+        end = self.write_index % self.capacity + self.capacity
+        return self.times[end - n:end], self.data[:, end - n:end]
+
+    def window(self, start, stop):
+        """
+        Return (times, data) views of samples with absolute indices [start, stop),
+        clipped to what is still held.
+        """
+        start = max(start, self.write_index - len(self))
+        stop = max(start, min(stop, self.write_index))
+        p = start % self.capacity
+        n = stop - start
+        return self.times[p:p + n], self.data[:, p:p + n]
+
+    def since(self, t0):
+        """Return (times, data) views of the held samples with timestamp >= t0."""
+        times, data = self.latest()
+        start = np.searchsorted(times, t0, side="left")
+        return times[start:], data[:, start:]
+
+    def clear(self):
+        self.write_index = 0
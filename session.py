@@ -0,0 +1,229 @@
+import bisect, json, os, sys
+import numpy as np
+
+from stream_writer import open_chunk_file
+
+# ─── Session files ──────────────────────────────────────────────
+# HDF5 layout (one file per session):
+#   /timestamps  (n,)          float64
+#   /eeg         (n_eeg, n)    float64, chunked per channel, compressed
+#   /aux         (n_aux, n)    float64, chunked per channel, compressed
+#   attrs['meta']              JSON: sampling_rate, board_id, analogue_mode,
+#                              channel_map, ...
+# Readers expose the same API for HDF5 sessions and chunk files (.bin), so
+# review and training code does not care which one the recorder produced.
+
+
+class HDF5SessionSink:
+    """ChunkWriter sink that appends to a chunked, compressed HDF5 session."""
+
+    def __init__(self, path, n_eeg, n_aux, sampling_rate, meta=None,
+                 chunk_samples=None, compression='gzip', compression_opts=1):
+        # h5py only loads once something is actually recorded
+        import h5py
+
+        chunk = chunk_samples or sampling_rate
+        meta = dict(meta or {}, n_eeg=n_eeg, n_aux=n_aux, sampling_rate=sampling_rate)
+        self.path = path
+        self.file = h5py.File(path, 'w')
+        self.file.attrs['meta'] = json.dumps(meta)
+        self.file.attrs['sampling_rate'] = sampling_rate
+
+        opts = dict(compression=compression, compression_opts=compression_opts,
+                    shuffle=True, dtype='f8')
+        if compression != 'gzip':
+            opts.pop('compression_opts')
+        self.ts = self.file.create_dataset('timestamps', shape=(0,), maxshape=(None,),
+                                           chunks=(chunk,), **opts)
+        self.eeg = self.file.create_dataset('eeg', shape=(n_eeg, 0), maxshape=(n_eeg, None),
+                                            chunks=(1, chunk), **opts)
+        # boards without analog inputs have n_aux = 0; a (1, chunk) chunk needs a row to fit
+        self.aux = self.file.create_dataset('aux', shape=(n_aux, 0), maxshape=(n_aux or None, None),
+                                            chunks=(1, chunk), **opts)
+
+    def append(self, eeg, aux, ts):
+        n0, n = self.ts.shape[0], len(ts)
+        for ds, block in ((self.eeg, eeg), (self.aux, aux)):
+            ds.resize(n0 + n, axis=1)
+            ds[:, n0:] = block
+        self.ts.resize((n0 + n,))
+        self.ts[n0:] = ts
+        # keep what is on disk consistent after every chunk
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _SessionReader:
+    """Shared time-range helpers; subclasses set meta, ts, eeg and aux."""
+
+    @property
+    def sampling_rate(self):
+        return self.meta['sampling_rate']
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def t_start(self):
+        return float(self.ts[0]) if len(self) else 0.0
+
+    @property
+    def t_end(self):
+        return float(self.ts[-1]) if len(self) else 0.0
+
+    def index_of(self, t):
+        """First sample index with timestamp >= t."""
+        return int(np.searchsorted(self.ts, t))
+
+    def read(self, start=0, stop=None, channels=None):
+        """Return (eeg, aux, ts) for samples [start, stop), optionally a subset of EEG channels."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = max(0, min(start, stop))
+        if channels is None:
+            eeg = self.eeg[:, start:stop]
+        else:
+            eeg = np.stack([self.eeg[c, start:stop] for c in channels]) if len(channels) \
+                else np.zeros((0, stop - start))
+        return np.asarray(eeg), np.asarray(self.aux[:, start:stop]), np.asarray(self.ts[start:stop])
+
+    def read_time(self, t0, t1, channels=None):
+        """Return (eeg, aux, ts) for timestamps in [t0, t1)."""
+        return self.read(self.index_of(t0), self.index_of(t1), channels)
+
+    def iter_chunks(self, chunk_samples):
+        for start in range(0, len(self), chunk_samples):
+            yield self.read(start, start + chunk_samples)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HDF5SessionReader(_SessionReader):
+    """Lazy reader: only the chunks covering a requested range are decompressed."""
+
+    def __init__(self, path):
+        import h5py
+
+        self.file = h5py.File(path, 'r')
+        self.meta = json.loads(self.file.attrs['meta'])
+        self.ts = self.file['timestamps']
+        self.eeg = self.file['eeg']
+        self.aux = self.file['aux']
+
+    def index_of(self, t):
+        # binary search straight on the dataset instead of loading all timestamps
+        return bisect.bisect_left(_LazySeq(self.ts), t)
+
+    def close(self):
+        self.file.close()
+
+
+class ChunkFileReader(_SessionReader):
+    """Memory-mapped reader for chunk files written by stream_writer.ChunkFileSink."""
+
+    def __init__(self, path):
+        self.meta, rows = open_chunk_file(path)
+        n_eeg = self.meta['n_eeg']
+        self.ts = rows[:, 0]
+        self.eeg = rows[:, 1:1 + n_eeg].T
+        self.aux = rows[:, 1 + n_eeg:].T
+
+
+class ArraySessionReader(_SessionReader):
+    """Reader over in-memory (or np.load-mapped) arrays, for legacy npy/CSV recordings."""
+
+    def __init__(self, eeg, aux, ts, meta):
+        self.meta = meta
+        self.eeg, self.aux, self.ts = eeg, aux, ts
+
+
+def _open_npy(path, sampling_rate):
+    # legacy recorder output: eeg_run-N.npy (+ aux_run-N.npy), no timestamps
+    eeg = np.load(path, mmap_mode='r')
+    aux_path = os.path.join(os.path.dirname(path),
+                            os.path.basename(path).replace('eeg_', 'aux_', 1))
+    if aux_path != path and os.path.exists(aux_path):
+        aux = np.load(aux_path, mmap_mode='r')
+    else:
+        aux = np.zeros((0, eeg.shape[1]))
+    ts = np.arange(eeg.shape[1]) / sampling_rate
+    meta = {'n_eeg': eeg.shape[0], 'n_aux': aux.shape[0], 'sampling_rate': sampling_rate}
+    return ArraySessionReader(eeg, aux, ts, meta)
+
+
+def _open_csv(path, sampling_rate):
+    # export_csv output, TimeSeriesTab CSVs and fake_streamer CSVs
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    eeg_cols = [c for c in df.columns if c.startswith(('EEG', 'Channel'))]
+    aux_cols = [c for c in df.columns if c.startswith('Aux')]
+    eeg = df[eeg_cols].to_numpy().T
+    aux = df[aux_cols].to_numpy().T if aux_cols else np.zeros((0, len(df)))
+    if 'Time' in df.columns:
+        ts = df['Time'].to_numpy(dtype=float)
+    else:
+        ts = np.arange(len(df)) / sampling_rate
+    meta = {'n_eeg': len(eeg_cols), 'n_aux': len(aux_cols), 'sampling_rate': sampling_rate}
+    return ArraySessionReader(eeg, aux, ts, meta)
+
+
+class _LazySeq:
+    def __init__(self, ds):
+        self.ds = ds
+
+    def __len__(self):
+        return len(self.ds)
+
+    def __getitem__(self, i):
+        return self.ds[i]
+
+
+def open_session(path, sampling_rate=250):
+    """
+    Open a recording for reading: HDF5 session (.h5/.hdf5), chunk file (.bin),
+    legacy .npy or .csv. `sampling_rate` is only used by formats that do not
+    store it.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.h5', '.hdf5'):
+        return HDF5SessionReader(path)
+    if ext == '.bin':
+        return ChunkFileReader(path)
+    if ext == '.npy':
+        return _open_npy(path, sampling_rate)
+    if ext == '.csv':
+        return _open_csv(path, sampling_rate)
+    raise ValueError(f'Unsupported session file: {path}')
+
+
+def export_csv(path, csv_path=None, block_samples=100_000):
+    """Offline CSV export of a session, streamed in blocks so memory stays bounded."""
+    import pandas as pd
+
+    csv_path = csv_path or os.path.splitext(path)[0] + '.csv'
+    with open_session(path) as reader, open(csv_path, 'w', newline='') as f:
+        n_eeg, n_aux = reader.eeg.shape[0], reader.aux.shape[0]
+        columns = (['Time'] + [f'EEG_{i}' for i in range(n_eeg)]
+                   + [f'Aux_{i}' for i in range(n_aux)])
+        header = True
+        for eeg, aux, ts in reader.iter_chunks(block_samples):
+            pd.DataFrame(np.column_stack((ts, eeg.T, aux.T)), columns=columns).to_csv(
+                f, header=header, index=False)
+            header = False
+        if header:
+            pd.DataFrame(columns=columns).to_csv(f, index=False)
+    return csv_path
+
+
+if __name__ == '__main__':
+    # python session.py data/run-111.h5 [out.csv]
+    print(export_csv(*sys.argv[1:3]))
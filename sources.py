@@ -0,0 +1,323 @@
+import time
+import numpy as np
+
+from collections import deque
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+
+from session import open_session
+from ports import find_openbci_port, BAUD_RATE
+import instrumentation
+
+# ─── Acquisition sources ────────────────────────────────────────
+# A source produces (eeg, aux, ts) chunks: eeg is (n_eeg, n), aux is
+# (n_aux, n) and ts is (n,) seconds. read_chunk() blocks for at most about
+# one chunk period and returns None when nothing new is available yet.
+# Sources that pace themselves put the seconds they slept in the last
+# read_chunk() in `waited`, so pump() can time the read without the sleep.
+
+
+class DataSource:
+    """Base class for everything that can feed the stream hub."""
+
+    name = 'source'
+
+    def __init__(self, n_eeg, n_aux, sampling_rate):
+        self.n_eeg = n_eeg
+        self.n_aux = n_aux
+        self.sampling_rate = sampling_rate
+        self.exhausted = False  # set by finite sources once everything was read
+        self.waited = 0.0
+
+    @property
+    def meta(self):
+        """Metadata stored alongside recordings of this source."""
+        return {'source': self.name}
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read_chunk(self):
+        raise NotImplementedError
+
+
+class AcquisitionStats:
+    """Rolling timing statistics of an acquisition loop, in milliseconds."""
+
+    def __init__(self, maxlen=1000):
+        self.jitter = deque(maxlen=maxlen)   # wake-up time minus deadline
+        self.latency = deque(maxlen=maxlen)  # read time minus newest sample timestamp
+        self.sizes = deque(maxlen=maxlen)
+        self.chunks = 0
+        self.late = 0  # deadlines missed by more than a whole period
+
+    def add(self, jitter, latency, n):
+        self.jitter.append(jitter)
+        self.latency.append(latency)
+        self.sizes.append(n)
+        self.chunks += 1
+
+    def summary(self):
+        if not self.chunks:
+            return {'chunks': 0, 'late': self.late}
+        jitter = 1e3 * np.abs(self.jitter)
+        latency = 1e3 * np.asarray(self.latency)
+        return {'chunks': self.chunks, 'late': self.late,
+                'mean_chunk': float(np.mean(self.sizes)),
+                'jitter_ms_mean': float(jitter.mean()),
+                'jitter_ms_p95': float(np.percentile(jitter, 95)),
+                'jitter_ms_max': float(jitter.max()),
+                'latency_ms_mean': float(latency.mean()),
+                'latency_ms_p95': float(np.percentile(latency, 95))}
+
+
+class BrainFlowSource(DataSource):
+    """
+    A BrainFlow board; defaults to the Cyton dongle found by find_openbci_port.
+
+    read_chunk() wakes on absolute monotonic deadlines every `chunk_ms` and
+    pulls whole chunks (a multiple of chunk_ms worth of samples) using
+    get_board_data_count(), so chunk sizes stay constant and latency is about
+    one chunk instead of a fixed 100 ms poll. Timing is kept in `self.timing`.
+
+    BrainFlow stamps samples with the wall clock. Chunks are re-stamped on
+    time.monotonic(), offset by the wall time at start() so they still read as
+    epoch seconds, and an NTP step or manual clock change mid-session cannot
+    make timestamps jump or run backwards.
+    """
+
+    name = 'brainflow'
+
+    def __init__(self, board_id=BoardIds.CYTON_BOARD.value, serial_port=None, ip_port=None,
+                 commands=('/0', '//', '/2'), chunk_ms=20, analogue_mode=None):
+        self.board_id = board_id
+        # the Cyton board mode command ('/2' analogue, ...) is sent after `commands`
+        # and stored in the session metadata
+        self.analogue_mode = analogue_mode
+        self.commands = tuple(commands) + ((analogue_mode,) if analogue_mode else ())
+        self.chunk_ms = chunk_ms
+        self.params = BrainFlowInputParams()
+        if serial_port:
+            self.params.serial_port = serial_port
+        if ip_port:
+            self.params.ip_port = ip_port
+        # the description omits channel types a board does not have (e.g. analog)
+        descr = BoardShim.get_board_descr(board_id)
+        self.eeg_channels = descr.get('eeg_channels', [])
+        self.aux_channels = descr.get('analog_channels', [])
+        self.ts_channel = descr['timestamp_channel']
+        super().__init__(len(self.eeg_channels), len(self.aux_channels),
+                         descr['sampling_rate'])
+        self.chunk = max(1, int(round(self.sampling_rate * chunk_ms / 1000)))
+        self.period = self.chunk / self.sampling_rate
+        self.board = None
+        self.timing = AcquisitionStats()
+        self._deadline = None
+        self._epoch = 0.0
+        self._last_ts = -np.inf
+
+    @property
+    def meta(self):
+        return {'source': self.name, 'board_id': self.board_id,
+                'commands': list(self.commands), 'analogue_mode': self.analogue_mode,
+                'channel_map': {'eeg': list(self.eeg_channels),
+                                'aux': list(self.aux_channels)}}
+
+    def _needs_serial_port(self):
+        return not self.params.serial_port and not self.params.ip_port \
+            and self.board_id in (BoardIds.CYTON_BOARD.value, BoardIds.CYTON_DAISY_BOARD.value)
+
+    def start(self):
+        print(BoardShim.get_board_descr(self.board_id))
+        if self._needs_serial_port():
+            self.params.serial_port = find_openbci_port()
+        self.board = BoardShim(self.board_id, self.params)
+        self.board.prepare_session()
+        for cmd in self.commands:
+            self.board.config_board(cmd)
+        self.board.start_stream(45000)
+        self.timing = AcquisitionStats()
+        # fixed for the session: monotonic + _epoch reads as wall time but never jumps
+        self._epoch = time.time() - time.monotonic()
+        self._last_ts = -np.inf
+        self._deadline = time.monotonic() + self.period
+
+    def stop(self):
+        if self.board is not None:
+            self.board.stop_stream()
+            self.board.release_session()
+            self.board = None
+
+    def read_chunk(self):
+        delay = self._deadline - time.monotonic()
+        self.waited = max(delay, 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        woke = time.monotonic()
+        jitter = woke - self._deadline
+        instrumentation.record('acquire.jitter', abs(jitter))
+        self._deadline += self.period
+        if woke - self._deadline > self.period:
+            # fell more than a period behind (e.g. GC pause): resync, don't burst
+            self.timing.late += 1
+            self._deadline = woke + self.period
+
+        available = self.board.get_board_data_count()
+        n = available - available % self.chunk
+        if not n:
+            return None
+        data = self.board.get_board_data(n)
+        now = time.monotonic()
+        # wall-clock stamps -> monotonic: the current wall/monotonic offset absorbs clock steps
+        ts = data[self.ts_channel] - (time.time() - now) + self._epoch
+        ts = np.maximum.accumulate(np.maximum(ts, self._last_ts))
+        self._last_ts = ts[-1]
+        self.timing.add(jitter, now + self._epoch - ts[-1], n)
+        return data[self.eeg_channels], data[self.aux_channels], ts
+
+
+class SyntheticBoardSource(BrainFlowSource):
+    """BrainFlow's built-in synthetic board; no hardware or config commands."""
+
+    name = 'brainflow-synthetic'
+
+    def __init__(self, chunk_ms=20):
+        super().__init__(BoardIds.SYNTHETIC_BOARD.value, commands=(), chunk_ms=chunk_ms)
+
+
+class _PacedSource(DataSource):
+    """Releases `chunk` samples per period against absolute deadlines."""
+
+    def __init__(self, n_eeg, n_aux, sampling_rate, chunk_ms, speed=1.0):
+        super().__init__(n_eeg, n_aux, sampling_rate)
+        self.chunk = max(1, int(round(sampling_rate * chunk_ms / 1000)))
+        self.speed = speed
+        self.produced = 0
+        self._t0 = None
+
+    def start(self):
+        self.produced = 0
+        self._t0 = time.perf_counter()
+
+    def _wait(self, n):
+        # speed 0/None: as fast as possible
+        if not self.speed:
+            return
+        due = self._t0 + (self.produced + n) / self.sampling_rate / self.speed
+        delay = due - time.perf_counter()
+        self.waited = max(delay, 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ReplaySource(_PacedSource):
+    """Replays a recording (.h5/.bin/.npy/.csv) at 1x, Nx or max speed."""
+
+    name = 'replay'
+
+    def __init__(self, path, speed=1.0, chunk_ms=40, loop=False, sampling_rate=250):
+        self.path = path
+        self.loop = loop
+        self.reader = open_session(path, sampling_rate)
+        super().__init__(self.reader.eeg.shape[0], self.reader.aux.shape[0],
+                         self.reader.sampling_rate, chunk_ms, speed)
+        # timestamp shift between loop passes
+        self.period = self.reader.t_end - self.reader.t_start + 1 / self.sampling_rate
+        self._pos = 0
+        self._offset = 0.0
+
+    @property
+    def meta(self):
+        return {'source': self.name, 'path': self.path, 'speed': self.speed}
+
+    def stop(self):
+        self.reader.close()
+
+    def read_chunk(self):
+        if self._pos >= len(self.reader):
+            if not self.loop or not len(self.reader):
+                self.exhausted = True
+                return None
+            self._pos = 0
+            self._offset += self.period
+        eeg, aux, ts = self.reader.read(self._pos, self._pos + self.chunk)
+        self._wait(len(ts))
+        self._pos += len(ts)
+        self.produced += len(ts)
+        return np.ascontiguousarray(eeg), np.ascontiguousarray(aux), ts + self._offset
+
+
+class GeneratorSource(_PacedSource):
+    """
+    Vectorized NumPy signal generator: one sinusoid per channel plus Gaussian
+    noise, generated a whole chunk at a time, so it keeps up with tens of kHz
+    across 64+ channels.
+    """
+
+    name = 'generator'
+
+    def __init__(self, n_eeg=8, n_aux=3, sampling_rate=250, chunk_ms=40, speed=1.0,
+                 amplitude=10.0, offset=20.0, noise=1.0, seed=None):
+        super().__init__(n_eeg, n_aux, sampling_rate, chunk_ms, speed)
+        self.amplitude = amplitude
+        self.offset = offset
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        # spread channels over 5-45 Hz (kept below Nyquist) with random phases
+        nyq = sampling_rate / 2
+        self.freqs = np.linspace(5, min(45, 0.8 * nyq), n_eeg)[:, None]
+        self.phases = self.rng.uniform(0, 2 * np.pi, (n_eeg, 1))
+        self.wall_t0 = None
+
+    @property
+    def meta(self):
+        return {'source': self.name, 'freqs': self.freqs.ravel().tolist()}
+
+    def start(self):
+        super().start()
+        self.wall_t0 = time.time()
+
+    def read_chunk(self):
+        n = self.chunk
+        self._wait(n)
+        idx = np.arange(self.produced, self.produced + n)
+        t = idx / self.sampling_rate
+        eeg = np.sin(2 * np.pi * self.freqs * t + self.phases)
+        eeg *= self.amplitude
+        eeg += self.offset
+        if self.noise:
+            eeg += self.noise * self.rng.standard_normal(eeg.shape)
+        aux = np.zeros((self.n_aux, n))
+        self.produced += n
+        return eeg, aux, self.wall_t0 + t
+
+
+def pump(source, q, stop_event, sink=None):
+    """
+    Run `source` until it is exhausted or `stop_event` is set, putting chunks
+    into `q` (a StreamHub or anything with put()).
+    """
+    source.start()
+    pushed = 0
+    try:
+        while not stop_event.is_set() and not source.exhausted:
+            t0 = time.perf_counter()
+            source.waited = 0.0
+            chunk = source.read_chunk()
+            elapsed = time.perf_counter() - t0
+            # pacing sleeps go to their own histogram so acquire.read is the read itself
+            instrumentation.record('acquire.wait', source.waited)
+            if chunk is None:
+                continue
+            instrumentation.record('acquire.read', max(elapsed - source.waited, 0.0))
+            if len(chunk[2]):
+                instrumentation.record_age('acquire.latency', chunk[2][-1])
+            q.put(chunk)
+            if sink is not None:
+                sink.put(*chunk)
+            pushed += len(chunk[2])
+    finally:
+        source.stop()
+    return pushed
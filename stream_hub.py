@@ -0,0 +1,193 @@
+import time
+import numpy as np
+
+from collections import deque
+from threading import Condition, Event
+from weakref import WeakSet
+from ring_buffer import RingBuffer
+from bounded_queue import register
+import instrumentation
+
+
+class Subscription:
+    """
+    One consumer's cursor into a StreamHub.
+
+    Every read returns all pending samples as one batch. What happens when the
+    consumer falls behind depends on `policy`:
+
+    - 'drop-oldest' (default): reading never blocks the producer; a consumer
+      more than `max_lag` samples behind (default: the hub's whole buffer)
+      skips ahead and the skipped samples are counted in `dropped`.
+    - 'block': the producer waits up to the hub's `block_timeout` before
+      overwriting samples this consumer has not read yet. Use it for
+      consumers that must not lose data; acquisition stalls with them.
+    """
+
+    POLICIES = ('drop-oldest', 'block')
+
+    def __init__(self, hub, max_lag=None, policy='drop-oldest', name='subscriber'):
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown subscription policy {policy!r}; expected one of {self.POLICIES}')
+        self.hub = hub
+        self.max_lag = max_lag
+        self.policy = policy
+        # start at "now" of the current stream
+        self.generation = hub.generation  # hub configuration the cursor belongs to
+        self.cursor = hub.buffer.write_index if hub.buffer is not None else 0
+        self.dropped = 0
+        self.delivered = 0
+        self.max_depth = 0
+        self.name = register(name, self)
+
+    def read(self, max_samples=None):
+        """Return (eeg, aux, ts) with everything new since the last read, or None."""
+        return self.hub._read(self, max_samples)
+
+    def skip(self):
+        """Forget the backlog; the next read starts with data published after now."""
+        self.hub._skip(self)
+
+    @property
+    def lag(self):
+        """Samples published but not yet read."""
+        return self.hub._lag(self)
+
+    def stats(self):
+        lag = self.lag
+        buf_capacity = self.hub.buffer.capacity if self.hub.buffer is not None else 0
+        capacity = min(self.max_lag or buf_capacity, buf_capacity)
+        # anything beyond capacity is already lost, even if not read yet
+        depth = min(lag, capacity)
+        self.max_depth = max(self.max_depth, depth)
+        return {'enqueued': self.delivered + self.dropped + lag,
+                'dropped': self.dropped + lag - depth,
+                'depth': depth, 'max_depth': self.max_depth,
+                'capacity': capacity, 'policy': self.policy}
+
+
+class StreamHub:
+    """
+    Single-producer, multi-consumer broadcast of (eeg, aux, ts) chunks.
+
+    The producer writes each chunk once into a shared ring buffer; every
+    subscriber keeps its own cursor and copies out only what it reads, so
+    adding consumers costs the producer nothing and consumers no longer steal
+    samples from each other. `put()` accepts the same (eeg, aux, ts) tuples
+    as a Queue, so sources.pump() can publish through it unchanged.
+    """
+
+    def __init__(self, capacity_seconds=10.0, block_timeout=1.0):
+        self.capacity_seconds = capacity_seconds
+        self.block_timeout = block_timeout
+        self.cond = Condition()
+        self._blocking = WeakSet()  # subscriptions with policy='block'
+        self.buffer = None
+        self._published = deque(maxlen=256)  # (write index after a publish, perf_counter)
+        self.n_eeg = self.n_aux = 0
+        self.sampling_rate = None
+        self.generation = 0
+
+    def configure(self, n_eeg, n_aux, sampling_rate):
+        """(Re)size the shared buffer for a new stream; existing cursors restart."""
+        capacity = max(1, int(self.capacity_seconds * sampling_rate))
+        with self.cond:
+            self.buffer = RingBuffer(n_eeg + n_aux, capacity)
+            self._published.clear()
+            self.n_eeg, self.n_aux = n_eeg, n_aux
+            self.sampling_rate = sampling_rate
+            self.generation += 1
+
+    def publish(self, eeg, aux, ts):
+        if self.buffer is None or eeg.shape[0] != self.n_eeg or aux.shape[0] != self.n_aux:
+            self.configure(eeg.shape[0], aux.shape[0], self.sampling_rate or 250)
+        block = np.concatenate((eeg, aux), axis=0) if aux.shape[0] else eeg
+        with self.cond:
+            if self._blocking:
+                # backpressure: give blocking consumers time to make room
+                self.cond.wait_for(lambda: self._has_room(len(ts)), self.block_timeout)
+            self.buffer.append(block, ts)
+            self._published.append((self.buffer.write_index, time.perf_counter()))
+
+    def put(self, item):
+        self.publish(*item)
+
+    def subscribe(self, max_lag=None, policy='drop-oldest', name='subscriber'):
+        sub = Subscription(self, max_lag, policy, name)
+        if policy == 'block':
+            self._blocking.add(sub)
+        return sub
+
+    # ─── subscriber side ───
+    def _has_room(self, n):
+        buf = self.buffer
+        return all(sub.generation != self.generation
+                   or buf.write_index + n - sub.cursor <= buf.capacity
+                   for sub in self._blocking)
+
+    def _sync(self, sub):
+        # called with the lock held; after a reconfigure, read the new stream from its start
+        if sub.generation != self.generation:
+            sub.generation = self.generation
+            sub.cursor = 0
+
+    def _read(self, sub, max_samples):
+        if self.buffer is None:
+            return None
+        with self.cond:
+            self._sync(sub)
+            buf = self.buffer
+            limit = min(sub.max_lag or buf.capacity, buf.capacity)
+            behind = buf.write_index - sub.cursor
+            sub.max_depth = max(sub.max_depth, min(behind, limit))
+            if behind > limit:
+                sub.dropped += behind - limit
+                sub.cursor = buf.write_index - limit
+                behind = limit
+            n = behind if max_samples is None else min(behind, max_samples)
+            if n <= 0:
+                return None
+            self._record_transit(sub.cursor)
+            times, data = buf.window(sub.cursor, sub.cursor + n)
+            ts = times.copy()
+            eeg = data[:self.n_eeg].copy()
+            aux = data[self.n_eeg:].copy()
+            sub.cursor += n
+            if self._blocking:
+                self.cond.notify_all()
+        sub.delivered += n
+        return eeg, aux, ts
+
+    def _record_transit(self, index):
+        # time since the publish that delivered sample `index`, the oldest in this read
+        for end, t in self._published:
+            if end > index:
+                instrumentation.record('hub.transit', time.perf_counter() - t)
+                return
+
+    def _skip(self, sub):
+        if self.buffer is None:
+            return
+        with self.cond:
+            self._sync(sub)
+            sub.cursor = self.buffer.write_index
+            if self._blocking:
+                self.cond.notify_all()
+
+    def _lag(self, sub):
+        if self.buffer is None:
+            return 0
+        if sub.generation != self.generation:
+            return self.buffer.write_index
+        return self.buffer.write_index - sub.cursor
+
+
+# ─── Shared stream for GUI ──────────────────────────────────────
+# every tab / processing stage subscribes with stream_hub.subscribe(). Kept
+# here rather than in recorder so tabs can import it without loading the
+# acquisition sources (brainflow, serial) or session writer (h5py).
+stream_hub = StreamHub(capacity_seconds=10.0)
+sampling_rate = 250  # used until a source configures the hub
+
+# Used to signal stop from GUI
+stop_event = Event()
@@ -0,0 +1,129 @@
+import json, os, struct
+import numpy as np
+
+from threading import Thread
+from bounded_queue import BoundedQueue
+
+# ─── Appendable chunk file ──────────────────────────────────────
+# Layout:  MAGIC | uint32 header length | JSON header | float64 rows
+# Each row is [timestamp, eeg_0 .. eeg_n, aux_0 .. aux_m]. Rows are only
+# ever appended, so a file cut short by a crash is still readable up to the
+# last complete chunk.
+
+MAGIC = b'SYNCHNK1'
+DTYPE = np.float64
+
+
+def _columns(n_eeg, n_aux):
+    return (['Time'] + [f'EEG_{i}' for i in range(n_eeg)]
+            + [f'Aux_{i}' for i in range(n_aux)])
+
+
+def write_header(f, meta):
+    blob = json.dumps(meta).encode()
+    f.write(MAGIC)
+    f.write(struct.pack('<I', len(blob)))
+    f.write(blob)
+
+
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a chunk file (bad magic).')
+    (length,) = struct.unpack('<I', f.read(4))
+    meta = json.loads(f.read(length).decode())
+    return meta, len(MAGIC) + 4 + length
+
+
+class ChunkFileSink:
+    """Appends [timestamp, eeg..., aux...] rows to a chunk file."""
+
+    def __init__(self, path, n_eeg, n_aux, sampling_rate, meta=None, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        header = {'n_eeg': n_eeg, 'n_aux': n_aux, 'sampling_rate': sampling_rate,
+                  'dtype': np.dtype(DTYPE).str, 'columns': _columns(n_eeg, n_aux)}
+        header.update(meta or {})
+        self._file = open(path, 'wb')
+        write_header(self._file, header)
+        self._file.flush()
+
+    def append(self, eeg, aux, ts):
+        rows = np.column_stack((ts, eeg.T, aux.T)).astype(DTYPE, copy=False)
+        self._file.write(rows.tobytes())
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class ChunkWriter:
+    """
+    Background writer that appends fixed-size chunks to a sink.
+
+    Acquisition calls `put(eeg, aux, ts)` with whatever it just pulled from the
+    board; the writer thread gathers `chunk_samples` samples and hands them to
+    the sink as one block, so memory stays flat for any session length. The
+    sink is anything with `append(eeg, aux, ts)` and `close()`, e.g.
+    ChunkFileSink or session.HDF5SessionSink.
+
+    The hand-off queue holds at most `max_pending` chunks. With the default
+    'block' policy a stalled disk pushes back on acquisition for up to
+    `block_timeout` seconds per chunk before chunks are dropped (and counted).
+    """
+
+    def __init__(self, sink, chunk_samples=250, max_pending=256, policy='block',
+                 block_timeout=1.0, name='recorder'):
+        self.sink = sink
+        self.chunk_samples = chunk_samples
+        self.block_timeout = block_timeout
+        self.samples_written = 0
+
+        self._queue = BoundedQueue(max_pending, policy, name=name)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, eeg, aux, ts):
+        return self._queue.put((eeg, aux, ts), timeout=self.block_timeout)
+
+    def close(self):
+        """Flush what is pending and wait for the writer thread to finish."""
+        self._queue.close()
+        self._thread.join()
+
+    def _write(self, pending):
+        eeg, aux, ts = zip(*pending)
+        ts = np.concatenate(ts)
+        self.sink.append(np.concatenate(eeg, axis=1), np.concatenate(aux, axis=1), ts)
+        self.samples_written += len(ts)
+
+    def _run(self):
+        pending, count = [], 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            pending.append(item)
+            count += len(item[2])
+            if count >= self.chunk_samples:
+                self._write(pending)
+                pending, count = [], 0
+        if pending:
+            self._write(pending)
+        self.sink.close()
+
+
+def open_chunk_file(path):
+    """Return (header, rows) with rows memory-mapped as (n_samples, n_columns)."""
+    with open(path, 'rb') as f:
+        meta, offset = read_header(f)
+    n_cols = len(meta['columns'])
+    row_bytes = n_cols * np.dtype(meta['dtype']).itemsize
+    # ignore a trailing partial row left by a crash mid-write
+    n_rows = (os.path.getsize(path) - offset) // row_bytes
+    if n_rows == 0:
+        return meta, np.zeros((0, n_cols), dtype=meta['dtype'])
+    rows = np.memmap(path, dtype=meta['dtype'], mode='r', offset=offset,
+                     shape=(n_rows, n_cols))
+    return meta, rows
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+import ports
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'openpty'), reason='needs pseudo-terminals')
+
+
+class FakeDevice:
+    """A pty that behaves like a serial device: answers b'v' with `reply` after `delay` s."""
+
+    def __init__(self, reply=b'OpenBCI V3 8-16 channel\n$$$', delay=0.0):
+        self.master, slave = os.openpty()
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self.reply = reply
+        self.delay = delay
+        self.probes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = os.read(self.master, 64)
+            except OSError:
+                return
+            if b'v' in data:
+                self.probes += 1
+                time.sleep(self.delay)
+                if self.reply:
+                    os.write(self.master, self.reply)
+
+    def close(self):
+        self._stop.set()
+        os.close(self._slave)
+        os.close(self.master)
+
+
+@pytest.fixture
+def devices():
+    made = []
+
+    def make(**kwargs):
+        made.append(FakeDevice(**kwargs))
+        return made[-1]
+
+    yield make
+    for device in made:
+        device.close()
+
+
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    path = tmp_path / 'port'
+    monkeypatch.setattr(ports, 'CACHE_FILE', str(path))
+    return path
+
+
+def test_probe_port_recognises_board(devices):
+    assert ports.probe_port(devices().port, timeout=0.5)
+    assert not ports.probe_port(devices(reply=b'something else$$$').port, timeout=0.5)
+    assert not ports.probe_port(devices(reply=b'').port, timeout=0.2)
+    assert not ports.probe_port('/dev/does-not-exist', timeout=0.2)
+
+
+def test_probe_stops_at_end_of_reply(devices):
+    t0 = time.monotonic()
+    assert ports.probe_port(devices().port, timeout=2.0)
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_find_probes_in_parallel_and_caches(devices, cache_file):
+    silent = [devices(reply=b'') for _ in range(4)]
+    board = devices(delay=0.1)
+    candidates = [d.port for d in silent] + [board.port]
+    t0 = time.monotonic()
+    assert ports.find_openbci_port(candidates, timeout=0.5) == board.port
+    # serial probing would take 4 x 0.5 s before reaching the board
+    assert time.monotonic() - t0 < 1.0
+    assert cache_file.read_text() == board.port
+
+
+def test_cached_port_is_tried_first(devices, cache_file):
+    other, board = devices(), devices()
+    cache_file.write_text(board.port)
+    assert ports.find_openbci_port([other.port, board.port], timeout=0.5) == board.port
+    assert other.probes == 0
+
+
+def test_cached_port_stays_in_rescan(devices, cache_file, monkeypatch):
+    # the first probe of the cached port fails (board still booting), the rescan finds it
+    board = devices()
+    cache_file.write_text(board.port)
+    probe, calls = ports.probe_port, []
+
+    def flaky(port, timeout=0.5):
+        calls.append(port)
+        return len(calls) > 1 and probe(port, timeout)
+
+    monkeypatch.setattr(ports, 'probe_port', flaky)
+    assert ports.find_openbci_port([board.port], timeout=0.5) == board.port
+    assert calls == [board.port, board.port]
+
+
+def test_no_board_raises(devices):
+    with pytest.raises(OSError):
+        ports.find_openbci_port([devices(reply=b'').port], timeout=0.2, use_cache=False)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -1,23 +1,56 @@
-from queue import Empty
-from recorder import data_queue, stop_event
-import pandas as pd
+import numpy as np
+
+from stream_hub import stream_hub, stop_event, sampling_rate
+from ring_buffer import RingBuffer
+from decimation import DECIMATORS
+from dsp import PRESETS, make_chain, preset_supported
+import instrumentation
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QScrollArea, QFrame, QSizePolicy
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QScrollBar, QFrame, QSizePolicy, QComboBox
 )
-from PySide6.QtCore import Qt, QTimer
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from PySide6.QtCore import Qt, QTimer, QEvent
+from plot_backends import PLOT_BACKENDS, Y_RANGE, FILTERED_Y_RANGE
+
+
+class ChannelGains:
+    """Per-channel amplitude exponents (gain = 2 ** value) in one compact array."""
+
+    def __init__(self, n_channels=0):
+        self.values = np.zeros(n_channels, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.values)
+
+    def resize(self, n_channels):
+        if n_channels > len(self.values):
+            self.values = np.concatenate(
+                (self.values, np.zeros(n_channels - len(self.values), dtype=np.float32)))
+
+    def __getitem__(self, channel):
+        return float(self.values[channel])
+
+    def __setitem__(self, channel, value):
+        self.values[channel] = value
+
+    def factors(self, channels):
+        return 2.0 ** self.values[channels]
 
 
 class ChannelRow(QWidget):
-    def __init__(self, channel_index, parent=None):
+    """
+    One on-screen row. Rows are recycled while scrolling: bind() points a row
+    at another channel, and its gain lives in the tab's shared ChannelGains.
+    """
+
+    HEIGHT = 210  # 200 px plot + margins
+
+    def __init__(self, channel_index, window_seconds=5.0, backend="blit", parent=None, gains=None):
         super().__init__(parent)
         self.channel_index = channel_index
-        self.amp_multiplier = 0.0
-        self.x_data = []
-        self.y_data = []
+        self.window_seconds = window_seconds
+        self.gains = gains if gains is not None else ChannelGains(channel_index + 1)
 
         row_layout = QHBoxLayout(self)
         row_layout.setContentsMargins(5, 5, 5, 5)
@@ -35,57 +68,72 @@ class ChannelRow(QWidget):
         self.label.setAlignment(Qt.AlignVCenter | Qt.AlignLeft)
         row_layout.addWidget(self.label)
 
-        # Matplotlib setup
-        self.figure = Figure()
-        self.figure.set_tight_layout(True)
-        self.ax = self.figure.add_subplot(111)
-        self.ax.set_ylim(0, 10)
-        self.ax.set_xlim(0, 50)
-
-        self.canvas = FigureCanvas(self.figure)
+        # plot widget from the selected rendering backend
+        self.plot = PLOT_BACKENDS[backend](window_seconds)
 
         self.plot_frame = QFrame()
         self.plot_frame.setFixedHeight(200)
         self.plot_frame.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         plot_layout = QVBoxLayout(self.plot_frame)
         plot_layout.setContentsMargins(0, 0, 0, 0)
-        plot_layout.addWidget(self.canvas)
+        plot_layout.addWidget(self.plot)
 
         row_layout.addWidget(self.plot_frame)
 
+    @property
+    def amp_multiplier(self):
+        return self.gains[self.channel_index]
+
+    @amp_multiplier.setter
+    def amp_multiplier(self, value):
+        self.gains[self.channel_index] = value
+
+    def bind(self, channel_index):
+        self.channel_index = channel_index
+        self.label.setText(f"Channel {channel_index+1}")
+
     def handle_plus(self):
         self.amp_multiplier += 0.5
 
     def handle_minus(self):
         self.amp_multiplier -= 0.5
 
-    def update_data(self, global_time, sample):
-        amp = (2 ** self.amp_multiplier) * sample
-        self.x_data.append(global_time)
-        self.y_data.append(amp)
-        if len(self.x_data) > 50:
-            self.x_data = self.x_data[-50:]
-            self.y_data = self.y_data[-50:]
+    def set_window_seconds(self, seconds):
+        self.window_seconds = seconds
+        self.plot.set_window(seconds)
 
-    def redraw(self):
-        self.ax.clear()
-        self.ax.plot(self.x_data, self.y_data, color="blue")
-        self.ax.set_ylim(0, 40)
-        if self.x_data:
-            last = self.x_data[-1]
-            self.ax.set_xlim(last - 50, last)
-        self.canvas.draw()
+    def set_y_range(self, lo, hi):
+        self.plot.set_y_range(lo, hi)
+
+    def redraw(self, times, samples, gain=None):
+        """Plot one channel from (times, samples) views into the tab's ring buffer."""
+        gain = 2 ** self.amp_multiplier if gain is None else gain
+        self.plot.set_data(times, gain * samples)
 
 
 class TimeSeriesTab(QWidget):
-    def __init__(self, parent=None):
+    WINDOW_CHOICES = [5, 10, 30, 60]
+
+    def __init__(self, parent=None, window_seconds=5.0, backend="blit", refresh_ms=33,
+                 decimation="minmax", sampling_rate=sampling_rate, filters="Raw"):
         super().__init__(parent)
         self.streaming = False
-        self.global_time = 0
-
-        # for recording CSV
-        self.record_times = []
-        self.record_data = []  # list of lists, one per channel
+        self.backend = backend
+        self.sampling_rate = sampling_rate
+        # "minmax", "lttb" or None to hand every sample to the renderer
+        self.decimation = decimation
+        # display filter chain (dsp.PRESETS); recorder.run_source records the raw stream
+        if not preset_supported(filters, sampling_rate):
+            filters = "Raw"
+        self.filter_name = filters
+        self.filters = make_chain(filters, sampling_rate)
+
+        # our own cursor into the shared stream
+        self.subscription = stream_hub.subscribe(name='Time Series')
+
+        # display buffer shared by all rows; sized once the channel count is known
+        self.window_seconds = window_seconds
+        self.buffer = None
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -114,28 +162,61 @@ class TimeSeriesTab(QWidget):
         self.remove_channel_button.clicked.connect(self.on_remove_channel)
         tp_layout.addWidget(self.remove_channel_button)
 
+        tp_layout.addWidget(QLabel("Window"))
+        self.window_combo = QComboBox()
+        choices = sorted(set(self.WINDOW_CHOICES) | {window_seconds})
+        self.window_combo.addItems([f"{s:g} s" for s in choices])
+        self.window_combo.setCurrentIndex(choices.index(window_seconds))
+        self.window_combo.currentIndexChanged.connect(
+            lambda i: self.set_window_seconds(choices[i]))
+        tp_layout.addWidget(self.window_combo)
+
+        tp_layout.addWidget(QLabel("Filter"))
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems(list(PRESETS))
+        # presets whose band does not fit below this rate's Nyquist stay greyed out
+        for i, name in enumerate(PRESETS):
+            if not preset_supported(name, sampling_rate):
+                self.filter_combo.model().item(i).setEnabled(False)
+        self.filter_combo.setCurrentText(filters)
+        self.filter_combo.currentTextChanged.connect(self.set_filter)
+        tp_layout.addWidget(self.filter_combo)
+
         tp_layout.addStretch()
         main_layout.addWidget(top_panel, stretch=0)
 
-        # --- Scroll area for channel rows ---
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
+        # --- Virtualized channel list ---
+        # only the rows that fit on screen exist; the scroll bar picks which
+        # channels they show, and gains for all channels live in self.gains
+        body = QWidget()
+        body_layout = QHBoxLayout(body)
+        body_layout.setContentsMargins(0, 0, 0, 0)
+        body_layout.setSpacing(0)
         self.scroll_content = QWidget()
         self.scroll_layout = QVBoxLayout(self.scroll_content)
         self.scroll_layout.setContentsMargins(5, 5, 5, 5)
         self.scroll_layout.setSpacing(5)
-        self.scroll_area.setWidget(self.scroll_content)
-        main_layout.addWidget(self.scroll_area, stretch=1)
+        self.scroll_layout.addStretch()
+        body_layout.addWidget(self.scroll_content, stretch=1)
+        self.scroll_bar = QScrollBar(Qt.Vertical)
+        self.scroll_bar.valueChanged.connect(self._bind_rows)
+        body_layout.addWidget(self.scroll_bar)
+        main_layout.addWidget(body, stretch=1)
 
         # initialize 8 channels
+        self.n_channels = 8
+        self.gains = ChannelGains(self.n_channels)
+        self._stream_channels = None
         self.channel_rows = []
-        for i in range(8):
-            self.add_channel_row(i)
+        self._layout_rows()
 
-        # timer for live updates
+        # timer for live updates when used standalone; SynapticGUI's frame
+        # scheduler stops it and calls poll()/render() instead
+        self.frame_interval = refresh_ms / 1000
+        self._pending_frame = None  # newest timestamp ingested but not drawn yet
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_plots)
-        self.timer.start(100)
+        self.timer.start(refresh_ms)
 
         # optional stylesheet…
         self.setStyleSheet("""
@@ -143,72 +224,160 @@ class TimeSeriesTab(QWidget):
         """)
 
     def add_channel_row(self, idx):
-        row = ChannelRow(idx, parent=self.scroll_content)
+        row = ChannelRow(idx, self.window_seconds, self.backend,
+                         parent=self.scroll_content, gains=self.gains)
+        row.set_y_range(*(FILTERED_Y_RANGE if self.filters else Y_RANGE))
+        # canvases swallow wheel events; scroll the channel list instead
+        row.plot.installEventFilter(self)
         self.channel_rows.append(row)
-        self.scroll_layout.addWidget(row)
-        # add a record list for this channel
-        self.record_data.append([])
+        self.scroll_layout.insertWidget(self.scroll_layout.count() - 1, row)
+
+    def _visible_rows(self):
+        spacing = self.scroll_layout.spacing()
+        height = self.scroll_content.height() - 10
+        return max(1, (height + spacing) // (ChannelRow.HEIGHT + spacing))
+
+    def _layout_rows(self):
+        """Create or drop pooled rows to match the viewport, then rebind them."""
+        wanted = min(self.n_channels, self._visible_rows())
+        while len(self.channel_rows) < wanted:
+            self.add_channel_row(len(self.channel_rows))
+        while len(self.channel_rows) > wanted:
+            self.channel_rows.pop().deleteLater()
+        self.scroll_bar.setRange(0, max(0, self.n_channels - wanted))
+        self.scroll_bar.setPageStep(max(1, wanted))
+        self._bind_rows()
+
+    def _bind_rows(self, *_):
+        first = self.scroll_bar.value()
+        for i, row in enumerate(self.channel_rows):
+            row.bind(first + i)
+        if not self.streaming:
+            # show the newly bound channels even while paused
+            self.redraw()
+
+    def set_channel_count(self, n):
+        self.n_channels = max(0, n)
+        self.gains.resize(self.n_channels)
+        self._layout_rows()
 
     def on_add_channel(self):
-        self.add_channel_row(len(self.channel_rows))
+        self.set_channel_count(self.n_channels + 1)
 
     def on_remove_channel(self):
-        if self.channel_rows:
-            # remove last row & its record list
-            self.channel_rows.pop().deleteLater()
-            self.record_data.pop()
+        if self.n_channels:
+            # remove last channel
+            self.set_channel_count(self.n_channels - 1)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._layout_rows()
+
+    def wheelEvent(self, event):
+        QApplication.sendEvent(self.scroll_bar, event)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Wheel:
+            QApplication.sendEvent(self.scroll_bar, event)
+            return True
+        return super().eventFilter(obj, event)
+
+    def set_window_seconds(self, seconds):
+        self.window_seconds = seconds
+        for row in self.channel_rows:
+            row.set_window_seconds(seconds)
+        # capacity changed; start the display buffer over
+        self.buffer = None
+
+    def set_filter(self, preset):
+        self.filter_name = preset
+        self.filters = make_chain(preset, self.sampling_rate)
+        for row in self.channel_rows:
+            row.set_y_range(*(FILTERED_Y_RANGE if self.filters else Y_RANGE))
+        # don't mix raw and filtered samples on screen
+        if self.buffer is not None:
+            self.buffer.clear()
+
+    def _ensure_buffer(self, n_channels):
+        if n_channels != self._stream_channels:
+            # new stream layout: list every channel it carries
+            self._stream_channels = n_channels
+            self.set_channel_count(n_channels)
+        if self.buffer is None or self.buffer.n_channels != n_channels:
+            capacity = max(1, int(self.window_seconds * self.sampling_rate))
+            self.buffer = RingBuffer(n_channels, capacity)
+        return self.buffer
 
     def on_start_stream(self):
-        # reset recording buffers
-        self.record_times = []
-        self.record_data = [[] for _ in self.channel_rows]
+        if self.buffer is not None:
+            self.buffer.clear()
+        if self.filters is not None:
+            self.filters.reset()
+        self.subscription.skip()
         stop_event.clear()
         self.streaming = True
 
     def on_stop_stream(self):
         self.streaming = False
+        # the acquisition thread closes its session file (recorder.save_file);
+        # convert it with session.export_csv
         stop_event.set()
-        self.save_csv()
 
-    def save_csv(self):
-        """Save recorded data to CSV with dynamic columns."""
-        df_dict = {'Time': self.record_times}
-        for idx, data_list in enumerate(self.record_data):
-            df_dict[f'Channel_{idx+1}'] = data_list
-        df = pd.DataFrame(df_dict)
-        df.to_csv('time_series_data.csv', index=False)
-        print("Saved time_series_data.csv")
+    def ingest(self, eeg, aux, ts):
+        """Filter a batch into the display ring buffer."""
+        display = self.filters.process(eeg) if self.filters is not None else eeg
+        self._ensure_buffer(eeg.shape[0]).append(display, ts)
 
-    def update_plots(self):
+    def poll(self):
+        """Ingest everything published since the last call; runs even while hidden."""
         if not self.streaming:
+            return False
+
+        # everything published since the last tick, as one batch
+        batch = self.subscription.read()
+        if batch is None:
+            return False
+
+        eeg_chunk, aux_chunk, ts_chunk = batch
+        with instrumentation.timed('process.time_series'):
+            self.ingest(eeg_chunk, aux_chunk, ts_chunk)
+        self._pending_frame = ts_chunk[-1]
+        return True
+
+    def render(self):
+        if self._pending_frame is None:
+            # no new data: skip plotting
             return
+        with instrumentation.timed(f'render.{self.backend}'):
+            self.redraw()
+        instrumentation.record_age('end_to_end', self._pending_frame)
+        self._pending_frame = None
 
-        self.global_time += 1
-
-        # record timestamp
-        self.record_times.append(self.global_time)
+    def update_plots(self):
+        self.poll()
+        self.render()
 
-        # fetch latest data chunk
-        chunk = None
-        while True:
-            try:
-                chunk = data_queue.get_nowait()
-            except Empty:
-                break
+    def shutdown(self):
+        """Stop refreshing (the tab is going away)."""
+        self.timer.stop()
+        self.streaming = False
 
-        if chunk is None:
-            # no new data: append zeros
-            for lst in self.record_data:
-                lst.append(0.0)
-            # and skip plotting
+    def redraw(self):
+        if self.buffer is None:
             return
-
-        eeg_chunk, aux_chunk, ts_chunk = chunk
-        # for each channel row, take last sample
-        for idx, row in enumerate(self.channel_rows):
-            sample = float(eeg_chunk[idx, -1])
-            # record actual sample
-            self.record_data[idx].append(sample)
-            # update plot
-            row.update_data(self.global_time, sample)
-            row.redraw()
+        # only the channels currently bound to on-screen rows
+        rows = [row for row in self.channel_rows if row.channel_index < self.buffer.n_channels]
+        if not rows:
+            return
+        channels = [row.channel_index for row in rows]
+        times, data = self.buffer.latest()
+        data = data[channels]
+        if self.decimation:
+            # bound the work by plot width, not by window length
+            n_columns = rows[0].plot.width()
+            times, data = DECIMATORS[self.decimation](times, data, n_columns)
+        gains = self.gains.factors(channels)
+        for idx, row in enumerate(rows):
+            # lttb picks per-channel sample times
+            row_times = times if times.ndim == 1 else times[idx]
+            row.redraw(row_times, data[idx], gains[idx])
@@ -0,0 +1,184 @@
+import os
+import bisect
+import numpy as np
+import torch
+
+from torch.utils.data import Dataset, DataLoader
+from session import open_session
+from vae_for_emg import INPUT_SIZE
+
+
+def compute_channel_stats(paths, channels=None, block_samples=100_000, sampling_rate=250):
+    """
+    Per-channel mean, std, min and max over all sessions in one streaming pass
+    (blocks merged with Chan et al.'s parallel variance update), so the
+    recordings never have to fit in memory.
+    """
+    count, mean, m2 = 0, None, None
+    lo = hi = None
+    for path in paths:
+        with open_session(path, sampling_rate) as reader:
+            for start in range(0, len(reader), block_samples):
+                eeg = reader.read(start, start + block_samples, channels)[0].astype(np.float64)
+                n = eeg.shape[1]
+                if n == 0:
+                    continue
+                b_mean = eeg.mean(axis=1)
+                b_m2 = ((eeg - b_mean[:, None]) ** 2).sum(axis=1)
+                if mean is None:
+                    count, mean, m2 = n, b_mean, b_m2
+                    lo, hi = eeg.min(axis=1), eeg.max(axis=1)
+                    continue
+                delta = b_mean - mean
+                total = count + n
+                mean = mean + delta * n / total
+                m2 = m2 + b_m2 + delta ** 2 * count * n / total
+                count = total
+                lo, hi = np.minimum(lo, eeg.min(axis=1)), np.maximum(hi, eeg.max(axis=1))
+    if mean is None:
+        raise ValueError('No samples found in the given sessions')
+    return {'count': count, 'mean': mean, 'std': np.sqrt(m2 / count), 'min': lo, 'max': hi}
+
+
+class ChannelScaler:
+    """
+    Per-channel normalisation of (..., n_channels, samples) windows, as
+    SessionWindowDataset applies it; inference reuses it so live windows are
+    scaled exactly like the training data.
+    """
+
+    def __init__(self, normalize, stats):
+        self.normalize = normalize
+        if normalize == 'minmax':
+            shift = np.asarray(stats['min'], dtype=np.float32)
+            span = np.asarray(stats['max'], dtype=np.float32) - shift
+        elif normalize == 'zscore':
+            shift = np.asarray(stats['mean'], dtype=np.float32)
+            span = np.asarray(stats['std'], dtype=np.float32)
+        else:
+            raise ValueError(f'Unknown normalization {normalize!r}')
+        self.shift = shift[:, None]
+        self.scale = np.where(span > 0, 1 / np.maximum(span, 1e-12), 1.0).astype(np.float32)[:, None]
+
+    def __call__(self, x):
+        x = (x - self.shift) * self.scale
+        if self.normalize == 'minmax':
+            np.clip(x, 0.0, 1.0, out=x)
+        return x
+
+
+class SessionWindowDataset(Dataset):
+    """
+    Overlapping windows over recorded sessions, produced on demand.
+
+    Sessions are opened through session.open_session (memory-mapped .bin/.npy,
+    chunk-wise HDF5), so an item reads only its own `window_samples` samples.
+    Each item is one window of `channels`, normalised per channel and flattened
+    (zero-padded or truncated) to `input_size` floats, which is the shape
+    vae_for_emg.train expects.
+
+    normalize:
+      'minmax' – scale to [0, 1] with the recording min/max and clip (for BCE)
+      'zscore' – subtract the mean, divide by the std
+      None     – raw values
+
+    Only paths and window offsets are pickled, so DataLoader workers each open
+    their own file handles.
+    """
+
+    def __init__(self, paths, window_samples=None, hop_samples=None, channels=None,
+                 input_size=INPUT_SIZE, normalize='minmax', stats=None, sampling_rate=250):
+        self.paths = [os.fspath(p) for p in ([paths] if isinstance(paths, (str, os.PathLike)) else paths)]
+        self.channels = channels
+        self.input_size = input_size
+        self.normalize = normalize
+        self.sampling_rate = sampling_rate
+
+        lengths, n_channels = [], set()
+        for path in self.paths:
+            with open_session(path, sampling_rate) as reader:
+                lengths.append(len(reader))
+                n_channels.add(len(channels) if channels is not None else reader.meta['n_eeg'])
+        if len(n_channels) > 1:
+            raise ValueError(f'Sessions have different channel counts: {sorted(n_channels)}')
+        self.n_channels = n_channels.pop() if n_channels else 0
+
+        self.window_samples = window_samples or max(1, input_size // max(1, self.n_channels))
+        self.hop_samples = hop_samples or max(1, self.window_samples // 2)
+        # cumulative window counts, for mapping a flat index to (session, start)
+        counts = [max(0, (n - self.window_samples) // self.hop_samples + 1) for n in lengths]
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(int)
+
+        if normalize is not None and stats is None:
+            stats = compute_channel_stats(self.paths, channels, sampling_rate=sampling_rate)
+        self.stats = stats
+        self._scaler = None if normalize is None else ChannelScaler(normalize, stats)
+
+        self._readers = {}
+        self._pid = None
+
+    @property
+    def normalization(self):
+        """What a model trained on this dataset expects at inference: stored in train() checkpoints."""
+        stats = None
+        if self.stats is not None:
+            # plain lists, so the checkpoint still loads with torch.load(weights_only=True)
+            stats = {k: np.asarray(v).tolist() for k, v in self.stats.items()}
+        return {'normalize': self.normalize, 'stats': stats, 'channels': self.channels}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_readers'], state['_pid'] = {}, None
+        return state
+
+    def _reader(self, i):
+        # readers are per process: file handles must not cross a fork
+        if self._pid != os.getpid():
+            self._readers, self._pid = {}, os.getpid()
+        if i not in self._readers:
+            self._readers[i] = open_session(self.paths[i], self.sampling_rate)
+        return self._readers[i]
+
+    def close(self):
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def locate(self, index):
+        """(session index, first sample) of window `index`."""
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        session = bisect.bisect_right(self.offsets, index) - 1
+        return session, int(index - self.offsets[session]) * self.hop_samples
+
+    def window(self, index):
+        """Raw (n_channels, window_samples) float32 samples of window `index`."""
+        session, start = self.locate(index)
+        eeg = self._reader(session).read(start, start + self.window_samples, self.channels)[0]
+        return np.asarray(eeg, dtype=np.float32)
+
+    def __getitem__(self, index):
+        x = self.window(index)
+        if self._scaler is not None:
+            x = self._scaler(x)
+        flat = np.zeros(self.input_size, dtype=np.float32)
+        n = min(self.input_size, x.size)
+        flat[:n] = x.reshape(-1)[:n]
+        return torch.from_numpy(flat)
+
+
+def make_loader(dataset, batch_size=128, shuffle=True, num_workers=4, pin_memory=None,
+                prefetch_factor=4, drop_last=False):
+    """DataLoader with worker prefetch and, on CUDA machines, pinned host memory."""
+    if pin_memory is None:
+        pin_memory = torch.cuda.is_available()
+    # more workers than cores only adds process overhead (and a torch warning)
+    num_workers = min(num_workers, os.cpu_count() or 1)
+    extra = {}
+    if num_workers > 0:
+        extra = {'prefetch_factor': prefetch_factor, 'persistent_workers': True}
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers,
+                      pin_memory=pin_memory, drop_last=drop_last, **extra)
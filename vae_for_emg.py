@@ -5,49 +5,77 @@ import matplotlib.pyplot as plt
 import time
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 # from torchvision import datasets, transforms
 from tqdm.auto import tqdm
 
+# defaults kept from the original MNIST-sized model
 INPUT_SIZE = 784
 WIDTH = 1024
 
+
+def _mlp(sizes):
+    layers = []
+    for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+        layers += [nn.Linear(n_in, n_out), nn.ReLU()]
+    return layers
+
+
 class VAE(nn.Module):
-    def __init__(self, latent_dim):
+    """
+    input_shape:   flat size, or (channels, samples) for a window
+    width, depth:  hidden layer width and number of hidden layers on each side
+    conv_channels: if set, the encoder is a 1-D conv stack over time (`depth`
+                   stride-2 layers with channels as input planes) instead of
+                   an MLP; needs a (channels, samples) input_shape
+    Inputs are always flat (batch, channels * samples) tensors.
+    """
+
+    def __init__(self, latent_dim, input_shape=INPUT_SIZE, width=WIDTH, depth=2,
+                 conv_channels=None, kernel_size=7):
         super(VAE, self).__init__()
+        if depth < 1:
+            raise ValueError(f'depth must be at least 1 (got {depth}); the latent heads take `width` inputs')
+        self.config = dict(input_shape=input_shape, width=width, depth=depth,
+                           conv_channels=conv_channels, kernel_size=kernel_size)
+        self.latent_dim = latent_dim
+        self.input_shape = tuple(np.atleast_1d(input_shape).tolist())
+        self.input_size = int(np.prod(self.input_shape))
+
+        if conv_channels:
+            if len(self.input_shape) != 2:
+                raise ValueError('A conv encoder needs input_shape=(channels, samples)')
+            n_channels, length = self.input_shape
+            layers = [nn.Unflatten(1, self.input_shape)]
+            for i in range(depth):
+                layers += [nn.Conv1d(n_channels if i == 0 else conv_channels, conv_channels,
+                                     kernel_size, stride=2, padding=kernel_size // 2),
+                           nn.ReLU()]
+                length = (length - 1) // 2 + 1
+            layers += [nn.Flatten(), nn.Linear(conv_channels * length, width), nn.ReLU()]
+            self.encoder = nn.Sequential(*layers)
+        else:
+            self.encoder = nn.Sequential(*_mlp([self.input_size] + [width] * depth))
         
-        self.encoder = nn.Sequential(
-            nn.Linear(INPUT_SIZE, WIDTH),
-            nn.ReLU(),
-            nn.Linear(WIDTH, WIDTH),
-            nn.ReLU()
-        )
-        
-        self.z_mean_layer = nn.Linear(WIDTH, latent_dim)
-        self.z_log_var_layer = nn.Linear(WIDTH, latent_dim)
+        self.z_mean_layer = nn.Linear(width, latent_dim)
+        self.z_log_var_layer = nn.Linear(width, latent_dim)
         
         self.decoder = nn.Sequential(
-            nn.Linear(latent_dim, WIDTH),
-            nn.ReLU(),
-            nn.Linear(WIDTH, WIDTH),
-            nn.ReLU(),
-            nn.Linear(WIDTH, INPUT_SIZE),
-            nn.Sigmoid()
-        )
+            *_mlp([latent_dim] + [width] * depth),
+            nn.Linear(width, self.input_size)
+        )  # logits; the loss applies the sigmoid, reconstruct() returns probabilities
 
         self.apply(self._init_weights)
 
     def _init_weights(self, m):
-        if isinstance(m, nn.Linear):
-            if hasattr(m, 'weight') and m.weight is not None:
-                if isinstance(m, nn.Sequential) or isinstance(m, nn.ModuleList):
-                    pass
-                elif m.out_features == INPUT_SIZE:
-                    # Output layer before sigmoid — use Xavier for sigmoid
-                    nn.init.xavier_uniform_(m.weight)
-                else:
-                    # ReLU layers — use Kaiming
-                    nn.init.kaiming_uniform_(m.weight, nonlinearity='relu')
-            if hasattr(m, 'bias') and m.bias is not None:
+        if isinstance(m, (nn.Linear, nn.Conv1d)):
+            if m is self.decoder[-1]:
+                # Output layer before sigmoid — use Xavier for sigmoid
+                nn.init.xavier_uniform_(m.weight)
+            else:
+                # ReLU layers — use Kaiming
+                nn.init.kaiming_uniform_(m.weight, nonlinearity='relu')
+            if m.bias is not None:
                 nn.init.constant_(m.bias, 0)
         
     def encode(self, x):
@@ -62,6 +90,10 @@ class VAE(nn.Module):
     
     def decode(self, x):
         return self.decoder(x)
+
+    def reconstruct(self, x):
+        z_mean, _ = self.encode(x)
+        return torch.sigmoid(self.decode(z_mean))
         
     def forward(self, x):
         z_mean, z_log_var = self.encode(x)
@@ -71,45 +103,130 @@ class VAE(nn.Module):
 
 
 def vae_loss(image, z_mean, z_log_var, reconstruction, beta):
-    bce_loss = nn.BCELoss(reduction='none')
+    """`reconstruction` holds decoder logits; BCE-with-logits fuses the sigmoid."""
     image = image.view(image.size(0), -1)
     recon = reconstruction.view(reconstruction.size(0), -1)
-    recon_loss = bce_loss(recon, image)
-    recon_loss = torch.sum(recon_loss, dim=1)
-    recon_loss = torch.mean(recon_loss)
-    
+    # summed over features, averaged over the batch
+    recon_loss = F.binary_cross_entropy_with_logits(recon.float(), image, reduction='sum') / image.size(0)
+
+    # exp() and the batch sum lose too much precision in bf16; keep the KL in fp32
+    z_mean, z_log_var = z_mean.float(), z_log_var.float()
     kl_divergence = torch.sum(-0.5 * torch.sum(1 + z_log_var - torch.square(z_mean) - torch.exp(z_log_var), dim=1))
-    
-    return recon_loss + beta * kl_divergence
 
+    return recon_loss + beta * kl_divergence
 
-def train(model, train_loader, loss_fxn, latent_dim, batch_size, device, beta=1e-3, lr=1e-3, epochs=10):
 
-    vae = model(latent_dim).to(device)
+def save_checkpoint(path, vae, optimizer, epoch, losses, best, latent_dim, stale=0, best_state=None,
+                    normalization=None):
+    # stale/best_state carry early stopping across a resume; normalization is
+    # how the training windows were scaled, so inference can do the same
+    state = {'model': vae.state_dict(), 'optimizer': optimizer.state_dict(), 'epoch': epoch,
+             'losses': losses, 'best': best, 'latent_dim': latent_dim,
+             'config': getattr(vae, 'config', {}), 'stale': stale, 'best_state': best_state,
+             'normalization': normalization}
+    # write then rename, so an interrupted save never leaves a truncated checkpoint
+    tmp = f'{path}.tmp'
+    torch.save(state, tmp)
+    os.replace(tmp, path)
+
+
+def evaluate(vae, loader, loss_fxn, beta, device, amp=False):
+    """Mean batch loss over `loader`, accumulated on the device (one sync at the end)."""
+    vae.eval()
+    total = torch.zeros((), device=device)
+    with torch.inference_mode(), torch.autocast(device.type, dtype=torch.bfloat16, enabled=amp):
+        for image in loader:
+            image = image.to(device, non_blocking=True).float()
+            reconstruction, z_mean, z_log_var = vae(image)
+            total += loss_fxn(image, z_mean, z_log_var, reconstruction, beta).float()
+    return total.item() / max(1, len(loader))
+
+
+def train(model, train_loader, loss_fxn, latent_dim, batch_size, device, beta=1e-3, lr=1e-3, epochs=10,
+          amp=False, compile=False, val_loader=None, checkpoint_path=None, checkpoint_every=1,
+          resume=False, patience=None, min_delta=0.0, model_kwargs=None):
+    """
+    Train `model(latent_dim, **model_kwargs)` and return (per-epoch mean losses, model).
+
+    amp:             bfloat16 autocast (CPU or CUDA)
+    compile:         run the training step through torch.compile
+    checkpoint_path: save model/optimizer state every `checkpoint_every` epochs;
+                     with `resume`, continue from it if it exists
+    patience:        stop after this many epochs without improving the
+                     validation loss (training loss without `val_loader`) by
+                     `min_delta`; the best weights are restored
+
+    When the loader's dataset has a `normalization` (SessionWindowDataset),
+    it is saved with each checkpoint for inference.load_vae.
+    """
+    device = torch.device(device)
+    dataset = getattr(train_loader, 'dataset', None)
+    dataset = getattr(dataset, 'dataset', dataset)  # through a torch Subset
+    normalization = getattr(dataset, 'normalization', None)
+    vae = model(latent_dim, **(model_kwargs or {})).to(device)
 
     optimizer = torch.optim.Adam(vae.parameters(), lr = lr)
 
     losses = []
-
-    for epoch in tqdm(range(epochs)):
+    start_epoch = 0
+    best, best_state, stale = float('inf'), None, 0
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        state = torch.load(checkpoint_path, map_location=device)
+        vae.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        start_epoch, losses, best = state['epoch'] + 1, state['losses'], state['best']
+        stale, best_state = state.get('stale', 0), state.get('best_state')
+        if patience is not None and stale >= patience:
+            start_epoch = epochs  # the checkpointed run had already stopped early
+
+    step_model = torch.compile(vae) if compile else vae
+
+    for epoch in tqdm(range(start_epoch, epochs), initial=start_epoch, total=epochs):
         vae.train()
-        overall_loss = 0
+        # accumulate on the device; .item() every batch would sync each step
+        overall_loss = torch.zeros((), device=device)
+        n_samples = 0
+        t0 = time.perf_counter()
         for batch_idx, image in enumerate(train_loader):
-            image = image.to(device).float()
+            image = image.to(device, non_blocking=True).float()
 
-            reconstruction, z_mean, z_log_var = vae(image)
-            loss = loss_fxn(image, z_mean, z_log_var, reconstruction, beta)  
-                
-            overall_loss += loss.item()
+            with torch.autocast(device.type, dtype=torch.bfloat16, enabled=amp):
+                reconstruction, z_mean, z_log_var = step_model(image)
+                loss = loss_fxn(image, z_mean, z_log_var, reconstruction, beta)
+
+            overall_loss += loss.detach().float()
+            n_samples += image.size(0)
 
             #backpropagate through parameters
-            optimizer.zero_grad()
+            optimizer.zero_grad(set_to_none=True)
             loss.backward()
             optimizer.step()
 
         #store losses to plot
-        losses.append(loss.detach().cpu().numpy() / (batch_size*len(train_loader)))
-
-        # print(f"Epoch {epoch + 1}/{epochs}, Loss: {overall_loss/(len(train_loader)):.4f}")
-        
+        epoch_loss = overall_loss.item() / max(1, len(train_loader))
+        elapsed = time.perf_counter() - t0
+        losses.append(epoch_loss)
+        monitored = epoch_loss
+        report = f"Epoch {epoch + 1}/{epochs}, Loss: {epoch_loss:.4f}"
+        if val_loader is not None:
+            monitored = evaluate(vae, val_loader, loss_fxn, beta, device, amp)
+            report += f", Val: {monitored:.4f}"
+        tqdm.write(f"{report}, {n_samples / elapsed:.0f} samples/s")
+
+        if monitored < best - min_delta:
+            best, stale = monitored, 0
+            if patience is not None:
+                best_state = {k: v.detach().clone() for k, v in vae.state_dict().items()}
+        else:
+            stale += 1
+        stop = patience is not None and stale >= patience
+        if checkpoint_path and ((epoch + 1) % checkpoint_every == 0 or epoch + 1 == epochs or stop):
+            save_checkpoint(checkpoint_path, vae, optimizer, epoch, losses, best, latent_dim,
+                            stale, best_state, normalization)
+        if stop:
+            tqdm.write(f"Early stopping after epoch {epoch + 1}")
+            break
+
+    if best_state is not None:
+        vae.load_state_dict(best_state)
     return losses, vae